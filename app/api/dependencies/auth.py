@@ -1,34 +1,30 @@
 # app/api/dependencies/auth.py
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Annotated
-import jwt
+from typing import Annotated, Awaitable, Callable
 from pydantic import ValidationError
 from jwt.exceptions import PyJWTError
 
-from app.core.security import ALGORITHM
+from app.core.exceptions import credentials_exception, permission_exception, rate_limit_exception
+from app.core.roles import Capability, ROLE_CAPABILITIES
+from app.core.security import decode_access_token
+from app.core.rate_limit import user_limit
+from app.core.timing import phase
 from app.config import settings
-from app.db.session import get_db
+from app.db.session import SAFE_METHODS, get_read_db, mark_recent_write
+from app.services.user_service import get_user_by_id, user_cache
+from app.services.token_revocation_service import revoked_tokens
 from app.schemas.token import TokenPayload
-from app.services.user_service import get_user_by_id
 from app.schemas.user import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_PREFIX}/login")
 
-async def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)],
-    db: Annotated[AsyncSession, Depends(get_db)]
-) -> User:
-    """Validate token and return current user"""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Invalid authentication credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+async def get_token_payload(token: Annotated[str, Depends(oauth2_scheme)]) -> TokenPayload:
+    """Verify the bearer token and return its claims, rejecting revoked tokens"""
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
-        token_data = TokenPayload(**payload)
+        with phase("jwt"):
+            token_data = decode_access_token(token)
         
         # Check token expiration
         if token_data.exp is None:
@@ -36,10 +32,42 @@ async def get_current_user(
     except (PyJWTError, ValidationError):
         raise credentials_exception
     
-    user = await get_user_by_id(db, token_data.sub)
-    if user is None:
+    # Also applies to tokens served from the token cache; a set lookup, no query
+    if token_data.jti in revoked_tokens:
         raise credentials_exception
     
+    return token_data
+
+async def get_current_user(
+    request: Request,
+    token_data: Annotated[TokenPayload, Depends(get_token_payload)],
+    db: Annotated[AsyncSession, Depends(get_read_db)]
+) -> User:
+    """Validate token and return current user"""
+    # Per-user rate limit, inlined so the local bucket check costs no coroutine
+    if settings.RATE_LIMIT_ENABLED:
+        retry_after = (
+            user_limit.take(token_data.sub) if user_limit.backend is None
+            else await user_limit.take_shared(token_data.sub)
+        )
+        if retry_after:
+            raise rate_limit_exception(user_limit.rejected(retry_after))
+    
+    # Keep this user's reads on the primary while the replica catches up
+    if request.method not in SAFE_METHODS:
+        mark_recent_write(token_data.sub)
+    
+    user = user_cache.get(token_data.sub)
+    if user is None:
+        # An update or delete committed during the lookup invalidates the
+        # key, and the row read before it must not be cached afterwards
+        version = user_cache.version(token_data.sub)
+        with phase("auth_lookup"):
+            user = await get_user_by_id(db, token_data.sub)
+        if user is None:
+            raise credentials_exception
+        user_cache.set(token_data.sub, user, version=version)
+    
     return user
 
 async def get_current_active_user(
@@ -59,4 +87,26 @@ async def get_current_active_superuser(
             status_code=status.HTTP_403_FORBIDDEN, 
             detail="Not enough permissions"
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+def require(capability: Capability) -> Callable[..., Awaitable[User]]:
+    """
+    Build a dependency that returns the current user if they are active and
+    their role has every capability in `capability`, and raises 403
+    otherwise (disabled users included).
+    
+    The check reads the precomputed role bitmask, with no database access
+    beyond the user lookup get_current_user already does.
+    """
+    mask = int(capability)
+    
+    async def require_capability(
+        current_user: Annotated[User, Depends(get_current_user)]
+    ) -> User:
+        if current_user.disabled:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user")
+        if ROLE_CAPABILITIES[current_user.role] & mask != mask:
+            raise permission_exception
+        return current_user
+    
+    return require_capability
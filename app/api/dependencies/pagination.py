@@ -1,18 +1,97 @@
-from typing import Optional, Dict, Any, Tuple
-from fastapi import Query
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional, Dict, Any, Tuple, Callable, Union
+from fastapi import HTTPException, Query, status
+
+
+def encode_cursor(position: Union[datetime, float], item_id: str) -> str:
+    """Encode a (created_at, id) or (score, id) keyset position as an opaque URL-safe cursor."""
+    key = position.isoformat() if isinstance(position, datetime) else position
+    raw = json.dumps([key, item_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode(cursor: str, parse_key: Callable[[Any], Any]) -> Tuple[Any, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key, item_id = json.loads(base64.urlsafe_b64decode(padded))
+        return parse_key(key), str(item_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Decode a (created_at, id) cursor produced by encode_cursor.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed
+    """
+    return _decode(cursor, datetime.fromisoformat)
+
+
+def decode_rank_cursor(cursor: str) -> Tuple[float, str]:
+    """
+    Decode a (score, id) cursor of a ranked search page.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed
+    """
+    return _decode(cursor, float)
+
+
+def user_cursor_key(item: Any) -> Tuple[datetime, str]:
+    """Keyset position of a user row: (created_at, id)."""
+    return item.created_at, item.id
+
+
+def rank_cursor_key(item: Any) -> Tuple[float, str]:
+    """Keyset position of a ranked search hit: (score, id)."""
+    return item.score, item.id
 
 
 class Pagination:
-    """Pagination parameters for API endpoints."""
+    """
+    Pagination parameters for API endpoints.
+
+    Supports two modes that share the same ordering:
+
+    - Offset mode: ``page``/``page_size``, handy for jumping to a page number.
+    - Cursor (keyset) mode: pass the ``next_cursor`` of a previous response as
+      ``cursor``. Each page is an index range scan of ``page_size`` rows no
+      matter how deep it is, and rows inserted concurrently never shift it.
+
+    Every response carries ``next_cursor``, so a client can start with page 1
+    and continue in cursor mode.
+    """
     
     def __init__(
         self, 
-        page: int = Query(1, ge=1, description="Page number"),
-        page_size: int = Query(20, ge=1, le=100, description="Number of items per page")
+        page: int = Query(1, ge=1, description="Page number (ignored when cursor is given)"),
+        page_size: int = Query(20, ge=1, le=100, description="Number of items per page"),
+        cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor")
     ):
-        self.page = page
+        self.cursor = cursor
+        self.page = None if cursor else page
         self.page_size = page_size
-        self.offset = (page - 1) * page_size
+        self.offset = 0 if cursor else (page - 1) * page_size
+        # One extra row tells us whether another page exists without a COUNT
+        self.fetch_limit = page_size + 1
+    
+    @property
+    def after(self) -> Optional[Tuple[datetime, str]]:
+        """(created_at, id) position to continue after, for pages in creation order."""
+        return decode_cursor(self.cursor) if self.cursor else None
+    
+    @property
+    def rank_after(self) -> Optional[Tuple[float, str]]:
+        """(score, id) position to continue after, for ranked search pages."""
+        return decode_rank_cursor(self.cursor) if self.cursor else None
     
     def get_pagination_params(self) -> Dict[str, Any]:
         """Return parameters for pagination queries."""
@@ -25,18 +104,29 @@ class Pagination:
         """Return SQL fragment for pagination."""
         return "LIMIT :limit OFFSET :offset"
     
-    def paginate_response(self, items: list, total: int) -> Dict[str, Any]:
+    def paginate_response(
+        self, 
+        items: list, 
+        total: Optional[int] = None,
+        cursor_key: Callable[[Any], Tuple[Any, str]] = user_cursor_key,
+        total_is_exact: Optional[bool] = None
+    ) -> Dict[str, Any]:
         """
         Create a paginated response.
         
         Args:
-            items: List of items for the current page
-            total: Total number of items
+            items: Items fetched with fetch_limit (one more than page_size)
+            total: Total number of items, if known
+            cursor_key: Returns the keyset position of an item, e.g. (created_at, id)
+            total_is_exact: False if total is an estimate or cached snapshot
             
         Returns:
             Dictionary with pagination metadata and items
         """
-        total_pages = (total + self.page_size - 1) // self.page_size
+        has_next = len(items) > self.page_size
+        items = items[:self.page_size]
+        next_cursor = encode_cursor(*cursor_key(items[-1])) if has_next else None
+        total_pages = (total + self.page_size - 1) // self.page_size if total is not None else None
         
         return {
             "items": items,
@@ -44,9 +134,11 @@ class Pagination:
                 "page": self.page,
                 "page_size": self.page_size,
                 "total_items": total,
+                "total_is_exact": total_is_exact if total is not None else None,
                 "total_pages": total_pages,
-                "has_previous": self.page > 1,
-                "has_next": self.page < total_pages
+                "has_previous": self.cursor is not None or self.page > 1,
+                "has_next": has_next,
+                "next_cursor": next_cursor
             }
         }
     
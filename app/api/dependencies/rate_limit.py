@@ -0,0 +1,28 @@
+# app/api/dependencies/rate_limit.py
+from fastapi import Depends, Request
+from fastapi.security import OAuth2PasswordRequestForm
+from typing import Annotated
+
+from app.core.exceptions import rate_limit_exception
+from app.core.rate_limit import RateLimit, login_ip_limit, login_username_limit
+from app.config import settings
+
+async def enforce(limit: RateLimit, key: str) -> None:
+    """Take a token for `key` from `limit`, raising 429 with Retry-After when none is left"""
+    retry_after = limit.take(key) if limit.backend is None else await limit.take_shared(key)
+    if retry_after:
+        raise rate_limit_exception(limit.rejected(retry_after))
+
+async def limit_login(
+    request: Request,
+    form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
+) -> None:
+    """
+    Limit login attempts per client IP and per username before any bcrypt
+    work is queued. Behind a proxy, run uvicorn with --proxy-headers so the
+    client IP comes from X-Forwarded-For.
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    await enforce(login_ip_limit, request.client.host if request.client else "")
+    await enforce(login_username_limit, form_data.username)
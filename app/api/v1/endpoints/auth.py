@@ -2,17 +2,29 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Annotated
-from datetime import datetime
+from typing import Annotated, Optional
+from datetime import datetime, timezone
 
+from pydantic import ValidationError
+from jwt.exceptions import ExpiredSignatureError, PyJWTError
+
+from app.core.timing import TimedRoute
+from app.core.exceptions import permission_exception
+from app.core.roles import Capability, has_capability
+from app.core.security import decode_access_token
 from app.db.session import get_db
+from app.api.dependencies.auth import get_current_active_user, get_token_payload
+from app.api.dependencies.rate_limit import limit_login
 from app.services.auth_service import authenticate_user, create_user_token
-from app.schemas.token import Token, TokenPayload
-from app.services.user_service import update_user_last_login
+from app.schemas.token import Token, TokenPayload, TokenRefresh, TokenRevoke
+from app.schemas.user import User
+from app.services.last_login_service import last_login_recorder
+from app.services.token_revocation_service import revoked_tokens
+from app.services.refresh_token_service import issue_refresh_token, rotate_refresh_token, revoke_refresh_token
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
-@router.post("/login", response_model=Token)
+@router.post("/login", response_model=Token, dependencies=[Depends(limit_login)])
 async def login(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     db: Annotated[AsyncSession, Depends(get_db)]
@@ -32,10 +44,74 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Update last login time
-    await update_user_last_login(db, user.id, datetime.utcnow())
+    # Record last login time (written to the database in the background)
+    last_login_recorder.record(user.id, datetime.now(timezone.utc))
+    
+    # Create access token, plus a refresh token so the client can renew it
+    # without sending the password (and paying for bcrypt) again
+    access_token = create_user_token(data={"sub": user.id})
+    refresh_token = await issue_refresh_token(db, user.id)
+    
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+@router.post("/refresh", response_model=Token)
+async def refresh(
+    refresh_data: TokenRefresh,
+    db: Annotated[AsyncSession, Depends(get_db)]
+):
+    """Exchange a refresh token for a new access token and a new refresh token"""
+    rotated = await rotate_refresh_token(db, refresh_data.refresh_token)
+    if rotated is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     
-    # Create access token
+    user, refresh_token = rotated
     access_token = create_user_token(data={"sub": user.id})
     
-    return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+def _revocable(token_data: TokenPayload) -> TokenPayload:
+    # Tokens issued before jti claims existed cannot be told apart
+    if token_data.jti is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Token has no jti claim and cannot be revoked"
+        )
+    return token_data
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    token_data: Annotated[TokenPayload, Depends(get_token_payload)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    refresh_data: Optional[TokenRefresh] = None
+):
+    """Revoke the access token used for this request, and the refresh token if given"""
+    await revoked_tokens.revoke(db, _revocable(token_data))
+    if refresh_data is not None:
+        await revoke_refresh_token(db, refresh_data.refresh_token)
+
+@router.post("/revoke", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_token(
+    revoke_data: TokenRevoke,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: Annotated[AsyncSession, Depends(get_db)]
+):
+    """Revoke an access token (own tokens, or any user's for admins/managers)"""
+    try:
+        token_data = decode_access_token(revoke_data.token)
+    except ExpiredSignatureError:
+        # Already unusable
+        return
+    except (PyJWTError, ValidationError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid token"
+        )
+    
+    if token_data.sub != current_user.id and not has_capability(current_user.role, Capability.UPDATE_OTHER):
+        raise permission_exception
+    
+    await revoked_tokens.revoke(db, _revocable(token_data))
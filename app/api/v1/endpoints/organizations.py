@@ -0,0 +1,120 @@
+# app/api/v1/endpoints/organizations.py
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Annotated
+
+from app.db.session import get_db, get_read_db
+from app.api.dependencies.auth import require
+from app.schemas.organization import OrganizationCreate, Organization, TeamCreate, TeamUpdate, Team
+from app.schemas.user import User
+from app.services.organization_service import (
+    create_organization, list_organizations, list_teams, create_team,
+    update_team, delete_team, add_team_member, remove_team_member
+)
+from app.core.roles import Capability
+from app.core.timing import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+def _not_found(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
+
+def _bad_request(error: ValueError) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
+
+@router.post("/", response_model=Organization, status_code=status.HTTP_201_CREATED)
+async def create_org(
+    org_data: OrganizationCreate,
+    current_user: Annotated[User, Depends(require(Capability.MANAGE_ORGANIZATIONS))],
+    db: Annotated[AsyncSession, Depends(get_db)]
+):
+    """Create an organization (super admin only)"""
+    try:
+        return await create_organization(db, org_data)
+    except ValueError as e:
+        raise _bad_request(e)
+
+@router.get("/", response_model=List[Organization])
+async def read_orgs(
+    current_user: Annotated[User, Depends(require(Capability.LIST_USERS))],
+    db: Annotated[AsyncSession, Depends(get_read_db)]
+):
+    """Get all organizations (admin/manager only)"""
+    return await list_organizations(db)
+
+@router.get("/{organization_id}/teams", response_model=List[Team])
+async def read_teams(
+    organization_id: str,
+    current_user: Annotated[User, Depends(require(Capability.LIST_USERS))],
+    db: Annotated[AsyncSession, Depends(get_read_db)]
+):
+    """Get the teams of an organization (admin/manager only)"""
+    return await list_teams(db, organization_id)
+
+@router.post("/{organization_id}/teams", response_model=Team, status_code=status.HTTP_201_CREATED)
+async def create_org_team(
+    organization_id: str,
+    team_data: TeamCreate,
+    current_user: Annotated[User, Depends(require(Capability.MANAGE_ORGANIZATIONS))],
+    db: Annotated[AsyncSession, Depends(get_db)]
+):
+    """Create a team, optionally below a parent team (super admin only)"""
+    try:
+        team = await create_team(db, organization_id, team_data)
+    except ValueError as e:
+        raise _bad_request(e)
+    if team is None:
+        raise _not_found("Organization not found")
+    return team
+
+@router.put("/{organization_id}/teams/{team_id}", response_model=Team)
+async def update_org_team(
+    organization_id: str,
+    team_id: str,
+    team_data: TeamUpdate,
+    current_user: Annotated[User, Depends(require(Capability.MANAGE_ORGANIZATIONS))],
+    db: Annotated[AsyncSession, Depends(get_db)]
+):
+    """Rename a team, change its lead or move it (super admin only)"""
+    try:
+        team = await update_team(db, organization_id, team_id, team_data)
+    except ValueError as e:
+        raise _bad_request(e)
+    if team is None:
+        raise _not_found("Team not found")
+    return team
+
+@router.delete("/{organization_id}/teams/{team_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_org_team(
+    organization_id: str,
+    team_id: str,
+    current_user: Annotated[User, Depends(require(Capability.MANAGE_ORGANIZATIONS))],
+    db: Annotated[AsyncSession, Depends(get_db)]
+):
+    """Delete a team and every team below it (super admin only)"""
+    if not await delete_team(db, organization_id, team_id):
+        raise _not_found("Team not found")
+
+@router.put("/{organization_id}/teams/{team_id}/members/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def add_org_team_member(
+    organization_id: str,
+    team_id: str,
+    user_id: str,
+    current_user: Annotated[User, Depends(require(Capability.MANAGE_ORGANIZATIONS))],
+    db: Annotated[AsyncSession, Depends(get_db)]
+):
+    """Add a user to a team (super admin only)"""
+    if not await add_team_member(db, organization_id, team_id, user_id):
+        raise _not_found("Team or user not found")
+
+@router.delete("/{organization_id}/teams/{team_id}/members/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def remove_org_team_member(
+    organization_id: str,
+    team_id: str,
+    user_id: str,
+    current_user: Annotated[User, Depends(require(Capability.MANAGE_ORGANIZATIONS))],
+    db: Annotated[AsyncSession, Depends(get_db)]
+):
+    """Remove a user from a team (super admin only)"""
+    if not await remove_team_member(db, organization_id, team_id, user_id):
+        raise _not_found("Team membership not found")
@@ -0,0 +1,48 @@
+# app/api/v1/endpoints/system.py
+from fastapi import APIRouter, Depends
+from typing import Annotated
+
+from app.api.dependencies.auth import get_current_active_superuser
+from app.core.security import token_cache
+from app.core.timing import TimedRoute, get_timing_stats
+from app.db.pool import get_pool_status
+from app.db.session import engine, replica_engine
+from app.schemas.user import User
+from app.services.user_service import user_cache
+from app.utils.logging import LoggerFactory
+
+router = APIRouter(route_class=TimedRoute)
+
+@router.get("/cache-stats")
+async def read_cache_stats(
+    current_user: Annotated[User, Depends(get_current_active_superuser)]
+):
+    """Get in-process cache counters for this worker (super admin only)"""
+    return {"user_cache": user_cache.stats(), "token_cache": token_cache.stats()}
+
+
+@router.get("/pool-stats")
+async def read_pool_stats(
+    current_user: Annotated[User, Depends(get_current_active_superuser)]
+):
+    """Get database connection pool occupancy and checkout wait times for this worker (super admin only)"""
+    status = get_pool_status(engine.pool)
+    if replica_engine is not None:
+        status["replica"] = get_pool_status(replica_engine.pool)
+    return status
+
+
+@router.get("/logging-stats")
+async def read_logging_stats(
+    current_user: Annotated[User, Depends(get_current_active_superuser)]
+):
+    """Get the number of log records dropped because a logging queue was full (super admin only)"""
+    return {"dropped_records": LoggerFactory.dropped_records()}
+
+
+@router.get("/timing-stats")
+async def read_timing_stats(
+    current_user: Annotated[User, Depends(get_current_active_superuser)]
+):
+    """Get per-phase request latency histograms for this worker (super admin only)"""
+    return get_timing_stats()
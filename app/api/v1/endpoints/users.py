@@ -1,18 +1,36 @@
 # app/api/v1/endpoints/users.py
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Annotated, Optional
+from typing import List, Annotated, Literal, Optional
 
-from app.db.session import get_db
-from app.api.dependencies.auth import get_current_user, get_current_active_superuser
-from app.schemas.user import User, UserCreate, UserUpdate, UserPasswordChange
+from app.db.session import get_db, get_read_db
+from app.api.dependencies.auth import get_current_user, require
+from app.api.dependencies.pagination import Pagination, rank_cursor_key, user_cursor_key
+from app.schemas.base import Page
+from app.schemas.user import User, UserCreate, UserUpdate, UserPasswordChange, UserImportResult, UserSearchResult
 from app.services.user_service import (
-    create_new_user, get_user_by_id, get_all_users, 
-    update_existing_user, delete_user, change_user_password
+    create_new_user, get_user_by_id, get_user_rows, 
+    update_existing_user, delete_user, change_user_password,
+    stream_users, EXPORT_COLUMNS, import_users, search_users, user_version
 )
-from app.core.roles import UserRole
+from app.services.count_service import count_users
+from app.services.refresh_token_service import revoke_user_refresh_tokens
+from app.core.roles import Capability, UserRole, has_capability
+from app.core.timing import TimedRoute
+from app.core.responses import ORJSONResponse
+from app.core.etag import make_etag, etag_matches, set_etag, not_modified
+from app.core.exceptions import ImportTooLargeError
+from app.utils.export import iter_csv, iter_ndjson
+from app.utils.imports import detect_format, parse_user_rows
+from app.config import settings
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
+
+# ETags include the response columns so a schema change invalidates every tag
+def _user_etag(user: User) -> str:
+    return make_etag((EXPORT_COLUMNS, *user_version(user)))
 
 @router.post("/", response_model=User, status_code=status.HTTP_201_CREATED)
 async def create_user(
@@ -23,9 +41,43 @@ async def create_user(
     """Create a new user (requires appropriate role)"""
     return await create_new_user(db, user_data, current_user)
 
+@router.post("/import", response_model=UserImportResult)
+async def import_users_file(
+    file: UploadFile,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)]
+):
+    """Create users in bulk from a CSV or NDJSON upload (requires appropriate role per row)"""
+    try:
+        # Parsed off the event loop: the spooled upload may be read from disk
+        rows = await run_in_threadpool(
+            parse_user_rows,
+            file.file, detect_format(file.filename or "", file.content_type or ""), settings.IMPORT_MAX_ROWS
+        )
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Upload must be UTF-8 encoded"
+        )
+    except ImportTooLargeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return await import_users(db, rows, current_user)
+
 @router.get("/me", response_model=User)
-async def read_users_me(current_user: User = Depends(get_current_user)):
-    """Get current user information"""
+async def read_users_me(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user)
+):
+    """Get current user information (304 if If-None-Match matches its ETag)"""
+    etag = _user_etag(current_user)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     return current_user
 
 @router.put("/me", response_model=User)
@@ -50,40 +102,92 @@ async def change_my_password(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Change own password"""
+    """Change own password (also revokes every refresh token of the user)"""
     await change_user_password(
         db, current_user.id, 
         password_data.current_password, 
         password_data.new_password
     )
+    await revoke_user_refresh_tokens(db, current_user.id)
     return {"status": "password changed"}
 
-@router.get("/", response_model=List[User])
+@router.get("/", response_model=Page[User])
 async def read_users(
-    current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[AsyncSession, Depends(get_db)],
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=100),
+    request: Request,
+    current_user: Annotated[User, Depends(require(Capability.LIST_USERS))],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    pagination: Annotated[Pagination, Depends()],
+    role: Optional[UserRole] = None,
+    organization_id: Optional[str] = None,
+    team_id: Optional[str] = Query(None, description="Members of this team and of the teams below it"),
+    lead_id: Optional[str] = Query(None, description="Users under the teams this manager or team head leads")
+):
+    """Get all users, paged by page number or cursor (admin/manager only; 304 if unchanged)"""
+    rows = await get_user_rows(
+        db, pagination.offset, pagination.fetch_limit, role, after=pagination.after,
+        organization_id=organization_id, team_id=team_id, lead_id=lead_id
+    )
+    count = await count_users(db, role, organization_id, team_id, lead_id)
+    # The page body is determined by its rows (including the look-ahead row
+    # behind has_next) and the total, so their versions tag it before any
+    # serialization happens
+    etag = make_etag((EXPORT_COLUMNS, count, *(user_version(row) for row in rows)))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    page = pagination.paginate_response(rows, count.total, total_is_exact=count.exact)
+    # Rows are already in Page[User] shape; returning a response skips FastAPI's
+    # response_model validation, which stays for the OpenAPI schema only
+    page["items"] = [row._asdict() for row in page["items"]]
+    response = ORJSONResponse(page)
+    set_etag(response, etag)
+    return response
+
+@router.get("/search", response_model=Page[UserSearchResult])
+async def search_users_endpoint(
+    current_user: Annotated[User, Depends(require(Capability.LIST_USERS))],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    pagination: Annotated[Pagination, Depends()],
+    q: str = Query(..., min_length=1, max_length=100, description="Text to look for in username, email and names"),
+    match: Literal["prefix", "fuzzy"] = Query("prefix", description="prefix: starts with q; fuzzy: contains or resembles q"),
+    ranked: bool = Query(False, description="Order by relevance instead of creation time")
+):
+    """Search users by username, email and name (admin/manager only)"""
+    users = await search_users(
+        db, q, match, ranked, pagination.offset, pagination.fetch_limit,
+        after=pagination.rank_after if ranked else pagination.after
+    )
+    return pagination.paginate_response(users, cursor_key=rank_cursor_key if ranked else user_cursor_key)
+
+@router.get("/export")
+async def export_users(
+    current_user: Annotated[User, Depends(require(Capability.LIST_USERS))],
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
     role: Optional[UserRole] = None
 ):
-    """Get all users (admin/manager only)"""
-    if current_user.role not in [UserRole.SUPER_ADMIN, UserRole.MANAGER]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions to view all users"
-        )
+    """Stream every user as NDJSON or CSV (admin/manager only)"""
+    if format == "csv":
+        body, media_type = iter_csv(stream_users(role), EXPORT_COLUMNS), "text/csv"
+    else:
+        body, media_type = iter_ndjson(stream_users(role)), "application/x-ndjson"
     
-    return await get_all_users(db, skip, limit, role)
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'}
+    )
 
 @router.get("/{user_id}", response_model=User)
 async def read_user(
     user_id: str,
+    request: Request,
+    response: Response,
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[AsyncSession, Depends(get_db)]
+    db: Annotated[AsyncSession, Depends(get_read_db)]
 ):
-    """Get user by ID (admin/manager or self)"""
+    """Get user by ID (admin/manager or self; 304 if If-None-Match matches its ETag)"""
     # Allow users to view their own data or admins/managers to view any user
-    if current_user.id != user_id and current_user.role not in [UserRole.SUPER_ADMIN, UserRole.MANAGER]:
+    if current_user.id != user_id and not has_capability(current_user.role, Capability.READ_OTHER):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
@@ -95,6 +199,11 @@ async def read_user(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
+    
+    etag = _user_etag(user)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     return user
 
 @router.put("/{user_id}", response_model=User)
@@ -105,14 +214,6 @@ async def update_user(
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
     """Update user by ID (admin/manager or self with limitations)"""
-    # Check if user exists
-    existing_user = await get_user_by_id(db, user_id)
-    if not existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
     # Self-update (with limitations) or admin update
     if current_user.id == user_id:
         # Prevent users from changing their own role
@@ -121,18 +222,24 @@ async def update_user(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="You cannot change your own role"
             )
-    elif current_user.role not in [UserRole.SUPER_ADMIN, UserRole.MANAGER]:
+    elif not has_capability(current_user.role, Capability.UPDATE_OTHER):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
     
-    return await update_existing_user(db, user_id, user_data)
+    user = await update_existing_user(db, user_id, user_data)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    return user
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user_by_id(
     user_id: str,
-    current_user: Annotated[User, Depends(get_current_active_superuser)],
+    current_user: Annotated[User, Depends(require(Capability.DELETE_USERS))],
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
     """Delete user (super admin only)"""
@@ -1,11 +1,13 @@
 # app/api/v1/router.py
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, users
+from app.api.v1.endpoints import auth, users, organizations, system
 
 router = APIRouter()
 
 # Include all endpoint routers
 router.include_router(auth.router, tags=["authentication"])
 router.include_router(users.router, prefix="/users", tags=["users"])
+router.include_router(organizations.router, prefix="/organizations", tags=["organizations"])
+router.include_router(system.router, prefix="/system", tags=["system"])
 
 # Add more routers as your API grows
\ No newline at end of file
@@ -0,0 +1,126 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Bounded in-process cache with per-entry expiry and LRU eviction.
+
+    The cache is meant to be used from the event loop of a single worker
+    process, so it does no locking. Every worker holds its own copy; keep
+    TTLs short so that changes made through another worker become visible
+    quickly.
+
+    To cache the result of an awaited lookup, read version(key) before the
+    lookup and pass it to set(); the value is dropped if the key was
+    invalidated meanwhile, so a stale read cannot overwrite an
+    invalidation.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        # Generation of the last invalidate() per key, bounded like the
+        # entries; keys pushed out fall back to _floor, which only makes
+        # pending sets of other keys fail (safe) rather than succeed
+        self._generation = 0
+        self._floor = 0
+        self._invalidated: "OrderedDict[Hashable, int]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Return the cached value for key, or None if missing or expired.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached value or None
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def version(self, key: Hashable) -> int:
+        """Return the invalidation generation of key, to pass to set()."""
+        return self._invalidated.get(key, self._floor)
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl_seconds: Optional[float] = None,
+        version: Optional[int] = None
+    ) -> None:
+        """
+        Store a value, evicting the least recently used entry when full.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl_seconds: Lifetime of this entry (defaults to the cache TTL)
+            version: version(key) read before the value was loaded; the value
+                is not stored if key has been invalidated since
+        """
+        if self.max_size <= 0:
+            return
+        if version is not None and version != self.version(key):
+            return
+
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        if ttl <= 0:
+            return
+
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single entry if present and reject pending sets of it."""
+        self._entries.pop(key, None)
+        self._generation += 1
+        self._invalidated[key] = self._generation
+        self._invalidated.move_to_end(key)
+        while len(self._invalidated) > max(self.max_size, 1):
+            _, self._floor = self._invalidated.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every entry and reject pending sets of any key."""
+        self._entries.clear()
+        self._generation += 1
+        self._floor = self._generation
+        self._invalidated.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss/eviction counters."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
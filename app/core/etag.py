@@ -0,0 +1,52 @@
+import hashlib
+from typing import Any, Iterable
+
+from fastapi import Request, Response, status
+
+# Clients may keep the representation but must revalidate it on every use
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(parts: Iterable[Any]) -> str:
+    """
+    Build a strong entity tag from the values a representation depends on.
+
+    The tag is a digest of each part's repr, which is stable across worker
+    processes for the str, datetime, enum and number values used here
+    (unlike hash(), which is salted per process).
+
+    Args:
+        parts: Values that together determine the response body
+
+    Returns:
+        Quoted ETag header value
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(repr(part).encode())
+        digest.update(b"\x1f")
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check If-None-Match against an ETag, using the weak comparison RFC 9110 requires for it."""
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in header.split(","))
+
+
+def set_etag(response: Response, etag: str) -> None:
+    """Add the ETag and revalidation headers to a 200 response."""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+def not_modified(etag: str) -> Response:
+    """Return an empty 304 Not Modified response for a matching If-None-Match."""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    )
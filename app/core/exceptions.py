@@ -22,6 +22,11 @@ class UserExistsError(DatabaseError):
     pass
 
 
+class ImportTooLargeError(Exception):
+    """Exception raised when a bulk upload has more rows than allowed."""
+    pass
+
+
 # HTTP Exceptions
 credentials_exception = HTTPException(
     status_code=status.HTTP_401_UNAUTHORIZED,
@@ -42,4 +47,19 @@ user_exists_exception = HTTPException(
 not_found_exception = HTTPException(
     status_code=status.HTTP_404_NOT_FOUND,
     detail="Resource not found",
-)
\ No newline at end of file
+)
+
+service_unavailable_exception = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Server is busy, please retry shortly",
+    headers={"Retry-After": "1"},
+)
+
+
+def rate_limit_exception(retry_after: int) -> HTTPException:
+    """429 response telling the client how many seconds to wait."""
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many requests, please retry later",
+        headers={"Retry-After": str(retry_after)},
+    )
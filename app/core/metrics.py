@@ -0,0 +1,397 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+LabelValues = Tuple[str, ...]
+
+
+class Metric:
+    """
+    Base class for metrics kept in plain dicts keyed by label values.
+
+    Metrics are only updated from the event loop thread of the worker, so the
+    updates are plain dict/int operations with no locking.
+    """
+
+    type_name = ""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        callback: Optional[Callable[[], Dict[LabelValues, float]]] = None
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # Optional function returning {label values: value}, read at collection
+        # time, for values another component already tracks
+        self._callback = callback
+        self._values: Dict[LabelValues, Any] = {}
+        registry.register(self)
+
+    def samples(self) -> List[Tuple[LabelValues, Any]]:
+        if self._callback is not None:
+            return list(self._callback().items())
+        return list(self._values.items())
+
+
+class Counter(Metric):
+    """Monotonically increasing value."""
+
+    type_name = "counter"
+
+    def inc(self, labels: LabelValues = (), amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+
+class Gauge(Metric):
+    """Value that goes up and down."""
+
+    type_name = "gauge"
+
+    def set(self, value: float, labels: LabelValues = ()) -> None:
+        self._values[labels] = value
+
+    def inc(self, labels: LabelValues = (), amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, labels: LabelValues = (), amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) - amount
+
+
+class Histogram(Metric):
+    """Fixed-bucket histogram; each sample is [bucket counts, sum, count]."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+
+    def observe(self, value: float, labels: LabelValues = ()) -> None:
+        entry = self._values.get(labels)
+        if entry is None:
+            entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+
+class Registry:
+    """Collection of metrics that can be snapshotted, merged and rendered."""
+
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> None:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+
+    def collect(self) -> Dict[str, Any]:
+        """Snapshot every metric as JSON-serializable data."""
+        snapshot = {}
+        for metric in self.metrics.values():
+            entry = {
+                "type": metric.type_name,
+                "help": metric.documentation,
+                "labelnames": list(metric.labelnames),
+                "samples": [[list(labels), value] for labels, value in metric.samples()],
+            }
+            if isinstance(metric, Histogram):
+                entry["buckets"] = list(metric.buckets)
+            snapshot[metric.name] = entry
+        return snapshot
+
+
+registry = Registry()
+
+
+def merge_snapshots(snapshots: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Combine snapshots from several worker processes.
+
+    Counters and histograms are summed across workers. Gauges describe the
+    state of one worker, so they keep a ``pid`` label instead.
+
+    Args:
+        snapshots: Snapshot per worker pid
+
+    Returns:
+        A single snapshot in the format of Registry.collect()
+    """
+    merged: Dict[str, Any] = {}
+    for pid, snapshot in snapshots.items():
+        for name, entry in snapshot.items():
+            target = merged.setdefault(name, {**entry, "samples": {}})
+            if entry["type"] == "gauge":
+                target["labelnames"] = entry["labelnames"] + ["pid"]
+                for labels, value in entry["samples"]:
+                    target["samples"][tuple(labels) + (str(pid),)] = value
+            elif entry["type"] == "counter":
+                for labels, value in entry["samples"]:
+                    key = tuple(labels)
+                    target["samples"][key] = target["samples"].get(key, 0.0) + value
+            else:
+                for labels, (counts, total, count) in entry["samples"]:
+                    key = tuple(labels)
+                    current = target["samples"].get(key)
+                    if current is None:
+                        target["samples"][key] = [list(counts), total, count]
+                    else:
+                        current[0] = [a + b for a, b in zip(current[0], counts)]
+                        current[1] += total
+                        current[2] += count
+
+    for entry in merged.values():
+        entry["samples"] = [[list(labels), value] for labels, value in entry["samples"].items()]
+    return merged
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: List[str], values: List[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def render(snapshot: Dict[str, Any]) -> str:
+    """Render a snapshot in the Prometheus text exposition format (0.0.4)."""
+    lines = []
+    for name, entry in sorted(snapshot.items()):
+        lines.append(f"# HELP {name} {entry['help']}")
+        lines.append(f"# TYPE {name} {entry['type']}")
+        names = entry["labelnames"]
+        for labels, value in entry["samples"]:
+            if entry["type"] != "histogram":
+                lines.append(f"{name}{_format_labels(names, labels)} {value}")
+                continue
+            counts, total, count = value
+            cumulative = 0
+            for bound, bucket_count in zip(entry["buckets"] + ["+Inf"], counts):
+                cumulative += bucket_count
+                le = 'le="%s"' % bound
+                lines.append(f"{name}_bucket{_format_labels(names, labels, le)} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(names, labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(names, labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+class MultiprocessCollector:
+    """
+    Shares metrics between uvicorn/gunicorn workers through a directory.
+
+    Each worker writes its snapshot to ``<dir>/<pid>.json`` every
+    ``interval`` seconds (and right before serving a scrape); the worker
+    answering /metrics merges every snapshot that is not stale. Snapshots
+    of workers that stopped writing for three intervals are ignored and
+    removed.
+    """
+
+    def __init__(self, directory: str, interval: float):
+        self.directory = directory
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, f"{os.getpid()}.json")
+
+    def write(self) -> None:
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(registry.collect(), f)
+        os.replace(temporary, self.path)
+
+    def read_all(self) -> Dict[str, Any]:
+        snapshots = {}
+        stale_before = time.time() - 3 * self.interval
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, filename)
+            try:
+                if os.path.getmtime(path) < stale_before:
+                    os.remove(path)
+                    continue
+                with open(path) as f:
+                    snapshots[filename[:-len(".json")]] = json.load(f)
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                self.write()
+            except OSError as e:
+                logger.error(f"Failed to write metrics snapshot: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+multiprocess_collector = (
+    MultiprocessCollector(settings.METRICS_MULTIPROC_DIR, settings.METRICS_SNAPSHOT_INTERVAL_SECONDS)
+    if settings.METRICS_MULTIPROC_DIR else None
+)
+
+
+def generate_latest() -> str:
+    """Render the metrics of this worker, or of all workers in multiprocess mode."""
+    if multiprocess_collector is None:
+        return render(registry.collect())
+    multiprocess_collector.write()
+    return render(merge_snapshots(multiprocess_collector.read_all()))
+
+
+# Caches reporting hit/miss counters, by name
+watched_caches: Dict[str, Any] = {}
+
+
+def watch_cache(name: str, cache: Any) -> None:
+    """Expose a cache's stats() counters as cache_* metrics under the given name."""
+    watched_caches[name] = cache
+
+
+def _cache_stat(key: str) -> Callable[[], Dict[LabelValues, float]]:
+    return lambda: {(name,): cache.stats()[key] for name, cache in watched_caches.items()}
+
+
+cache_hits_total = Counter("cache_hits_total", "Cache lookups served from the cache", ("cache",), _cache_stat("hits"))
+cache_misses_total = Counter("cache_misses_total", "Cache lookups that missed", ("cache",), _cache_stat("misses"))
+cache_evictions_total = Counter("cache_evictions_total", "Entries evicted to respect the size bound", ("cache",), _cache_stat("evictions"))
+cache_hit_ratio = Gauge("cache_hit_ratio", "Fraction of cache lookups that hit", ("cache",), _cache_stat("hit_ratio"))
+cache_size = Gauge("cache_size", "Entries currently cached", ("cache",), _cache_stat("size"))
+
+# Request metrics
+http_requests_in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being served")
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status")
+)
+
+# Database metrics
+db_queries_total = Counter("db_queries_total", "SQL statements executed")
+db_query_errors_total = Counter("db_query_errors_total", "SQL statements that raised an error")
+db_query_duration_seconds = Histogram("db_query_duration_seconds", "SQL statement execution time")
+
+# Called with (seconds, failed) after each SQL statement
+QueryObserver = Callable[[float, bool], None]
+
+
+def install_query_listeners(engine: Engine, observers: List[QueryObserver]) -> None:
+    """
+    Time every SQL statement on `engine` and report it to `observers`.
+
+    The start time is kept on the statement's execution context, so a
+    failed statement (reported through handle_error instead of
+    after_cursor_execute) leaves nothing behind on the pooled connection.
+    One pair of listeners serves every observer (metrics, Server-Timing).
+
+    Args:
+        engine: Sync engine (``async_engine.sync_engine``) to instrument
+        observers: Callables receiving the duration and whether it failed
+    """
+
+    def _report(context, failed: bool) -> None:
+        started = getattr(context, "_query_started", None)
+        if started is None:
+            return
+        context._query_started = None
+        seconds = time.perf_counter() - started
+        for observer in observers:
+            observer(seconds, failed)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        _report(context, False)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        _report(exception_context.execution_context, True)
+
+
+def record_query(seconds: float, failed: bool) -> None:
+    """QueryObserver counting SQL statements, their errors and their duration."""
+    db_queries_total.inc()
+    if failed:
+        db_query_errors_total.inc()
+    db_query_duration_seconds.observe(seconds)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording in-flight requests and latency per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status_code[0] = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_flight.dec()
+            route = scope.get("route")
+            http_request_duration_seconds.observe(
+                time.perf_counter() - started,
+                (scope["method"], getattr(route, "path", "unmatched"), str(status_code[0]))
+            )
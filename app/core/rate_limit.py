@@ -0,0 +1,213 @@
+import heapq
+import logging
+import math
+import time
+from typing import Dict, List, Optional, Protocol
+
+from app.config import settings
+from app.core.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+rate_limited_total = Counter("rate_limited_total", "Requests rejected with 429 by a rate limit", ("limit",))
+rate_limit_untracked_total = Counter(
+    "rate_limit_untracked_total", "Requests from new clients let through untracked because a limit was full", ("limit",)
+)
+
+
+class RateLimitBackend(Protocol):
+    """Token bucket store shared by every worker, e.g. Redis."""
+
+    async def take(self, name: str, key: str, rate: float, burst: int) -> float:
+        """
+        Take one token from the bucket of `key` under limit `name`.
+
+        Args:
+            name: Limit name, namespacing the keys
+            key: Client identity (IP address, username or user id)
+            rate: Tokens added per second
+            burst: Bucket capacity
+
+        Returns:
+            0.0 if a token was taken, else seconds until one is available
+        """
+        ...
+
+
+# Token bucket update run atomically inside Redis, on the Redis clock so all
+# workers agree on time. The result is returned as a string because Redis
+# truncates Lua numbers to integers.
+_REDIS_TOKEN_BUCKET = """
+redis.replicate_commands()
+local rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'stamp')
+local tokens = tonumber(state[1]) or burst
+local stamp = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + (now - stamp) * rate)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'stamp', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+return tostring(retry_after)
+"""
+
+
+class RedisRateLimitBackend:
+    """
+    RateLimitBackend on Redis, for limits shared by every worker and host.
+
+    Needs the optional ``redis`` package, imported only when this backend
+    is configured (RATE_LIMIT_REDIS_URL).
+    """
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("RATE_LIMIT_REDIS_URL is set but the redis package is not installed") from e
+        # Every authenticated request waits on this call, so fail fast and
+        # let take_shared fall back to local buckets
+        self._client = redis.from_url(
+            url,
+            socket_connect_timeout=settings.RATE_LIMIT_REDIS_TIMEOUT_SECONDS,
+            socket_timeout=settings.RATE_LIMIT_REDIS_TIMEOUT_SECONDS,
+        )
+        self._script = self._client.register_script(_REDIS_TOKEN_BUCKET)
+
+    async def take(self, name: str, key: str, rate: float, burst: int) -> float:
+        result = await self._script(keys=[f"ratelimit:{name}:{key}"], args=[rate, burst])
+        return float(result)
+
+
+class RateLimit:
+    """
+    Token bucket limit per client key.
+
+    Every key gets a bucket of `burst` tokens refilled at `per_minute` tokens
+    a minute; a request takes one token. Buckets live in a dict of
+    [tokens, timestamp] lists updated in place, so a check is one dict
+    lookup and a few float operations. When `max_keys` clients are tracked,
+    buckets that have refilled completely are dropped (they are
+    indistinguishable from new ones). Buckets still refilling are never
+    dropped, since that would hand a throttled client a fresh burst; if none
+    can be dropped, requests from new clients pass untracked until enough
+    buckets have refilled.
+
+    With a shared backend the buckets live there instead, and this worker's
+    buckets are only used while the backend is unreachable.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        per_minute: float,
+        burst: int,
+        max_keys: int,
+        backend: Optional[RateLimitBackend] = None
+    ):
+        self.name = name
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.max_keys = max_keys
+        self.backend = backend
+        self._buckets: Dict[str, List[float]] = {}
+        self._sweep_at = 0.0
+
+    def take(self, key: str) -> float:
+        """
+        Take a token from this worker's bucket for `key`.
+
+        Returns:
+            0.0 if the request may proceed, else seconds until it may retry
+        """
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_keys:
+                if now >= self._sweep_at:
+                    self._evict(now)
+                if len(self._buckets) >= self.max_keys:
+                    rate_limit_untracked_total.inc((self.name,))
+                    return 0.0
+            self._buckets[key] = [self.burst - 1.0, now]
+            return 0.0
+
+        tokens = bucket[0] + (now - bucket[1]) * self.rate
+        if tokens > self.burst:
+            tokens = self.burst
+        bucket[1] = now
+        if tokens >= 1.0:
+            bucket[0] = tokens - 1.0
+            return 0.0
+        bucket[0] = tokens
+        return (1.0 - tokens) / self.rate
+
+    async def take_shared(self, key: str) -> float:
+        """
+        Take a token from the shared backend, falling back to take() if it fails.
+
+        After a failure the backend is skipped for RATE_LIMIT_REDIS_RETRY_SECONDS
+        (by every limit of this worker), and the outage is logged once.
+        """
+        global _backend_retry_at, _backend_down
+        if time.monotonic() < _backend_retry_at:
+            return self.take(key)
+        try:
+            retry_after = await self.backend.take(self.name, key, self.rate, self.burst)
+        except Exception as e:
+            _backend_retry_at = time.monotonic() + settings.RATE_LIMIT_REDIS_RETRY_SECONDS
+            if not _backend_down:
+                _backend_down = True
+                logger.warning(f"Rate limit backend unavailable, using local buckets: {str(e)}")
+            return self.take(key)
+        if _backend_down:
+            _backend_down = False
+            logger.info("Rate limit backend available again")
+        return retry_after
+
+    def _evict(self, now: float) -> None:
+        refill_at = []
+        for key, (tokens, stamp) in list(self._buckets.items()):
+            full_at = stamp + (self.burst - tokens) / self.rate
+            if full_at <= now:
+                del self._buckets[key]
+            else:
+                refill_at.append(full_at)
+        # Sweep again only once a tenth of the capacity will have refilled, so
+        # the O(n) sweep runs at most once per max_keys / 10 new clients even
+        # when every bucket is active
+        shortfall = len(self._buckets) - self.max_keys * 9 // 10
+        self._sweep_at = heapq.nsmallest(shortfall, refill_at)[-1] if shortfall > 0 else now
+
+    def rejected(self, retry_after: float) -> int:
+        """Count a rejection and return its Retry-After value in whole seconds."""
+        rate_limited_total.inc((self.name,))
+        return max(1, math.ceil(retry_after))
+
+
+# Monotonic time before which take_shared does not try the backend again
+_backend_retry_at = 0.0
+_backend_down = False
+
+_backend: Optional[RateLimitBackend] = (
+    RedisRateLimitBackend(settings.RATE_LIMIT_REDIS_URL) if settings.RATE_LIMIT_REDIS_URL else None
+)
+
+login_ip_limit = RateLimit(
+    "login_ip", settings.RATE_LIMIT_LOGIN_IP_PER_MINUTE, settings.RATE_LIMIT_LOGIN_IP_BURST,
+    settings.RATE_LIMIT_MAX_KEYS, _backend
+)
+login_username_limit = RateLimit(
+    "login_username", settings.RATE_LIMIT_LOGIN_USERNAME_PER_MINUTE, settings.RATE_LIMIT_LOGIN_USERNAME_BURST,
+    settings.RATE_LIMIT_MAX_KEYS, _backend
+)
+user_limit = RateLimit(
+    "user", settings.RATE_LIMIT_USER_PER_MINUTE, settings.RATE_LIMIT_USER_BURST,
+    settings.RATE_LIMIT_MAX_KEYS, _backend
+)
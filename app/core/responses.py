@@ -0,0 +1,17 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson.
+
+    orjson encodes datetimes, enums and UUIDs natively, so endpoints can
+    return plain row dicts without building pydantic models first. UTC
+    offsets are written as "Z", matching pydantic's own datetime output.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
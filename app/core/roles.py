@@ -1,4 +1,4 @@
-from enum import Enum
+from enum import Enum, IntFlag
 from typing import Dict, List
 
 
@@ -21,6 +21,75 @@ ROLE_HIERARCHY: Dict[UserRole, List[UserRole]] = {
 }
 
 
+class Capability(IntFlag):
+    """
+    Actions a role may perform. Each role's capabilities are one bitmask in
+    ROLE_CAPABILITIES, so a permission check is a dict lookup and an AND.
+    """
+    CREATE_MEMBER = 1 << 0
+    CREATE_TEAM_HEAD = 1 << 1
+    CREATE_MANAGER = 1 << 2
+    CREATE_SUPER_ADMIN = 1 << 3
+    LIST_USERS = 1 << 4
+    READ_OTHER = 1 << 5
+    UPDATE_OTHER = 1 << 6
+    DELETE_USERS = 1 << 7
+    MANAGE_ORGANIZATIONS = 1 << 8
+
+
+# Capability needed to create a user with each role
+CREATE_CAPABILITY: Dict[UserRole, Capability] = {
+    UserRole.MEMBER: Capability.CREATE_MEMBER,
+    UserRole.TEAM_HEAD: Capability.CREATE_TEAM_HEAD,
+    UserRole.MANAGER: Capability.CREATE_MANAGER,
+    UserRole.SUPER_ADMIN: Capability.CREATE_SUPER_ADMIN,
+}
+
+# Capabilities other than creating users
+_GRANTED_CAPABILITIES: Dict[UserRole, Capability] = {
+    UserRole.SUPER_ADMIN: (
+        Capability.LIST_USERS | Capability.READ_OTHER | Capability.UPDATE_OTHER | Capability.DELETE_USERS
+        | Capability.MANAGE_ORGANIZATIONS
+    ),
+    UserRole.MANAGER: Capability.LIST_USERS | Capability.READ_OTHER | Capability.UPDATE_OTHER,
+    UserRole.TEAM_HEAD: Capability(0),
+    UserRole.MEMBER: Capability(0),
+}
+
+
+def _compile_capabilities() -> Dict[UserRole, int]:
+    table = {}
+    for role in UserRole:
+        mask = _GRANTED_CAPABILITIES[role]
+        for target in ROLE_HIERARCHY[role]:
+            mask |= CREATE_CAPABILITY[target]
+        table[role] = int(mask)
+    return table
+
+
+# Role -> capability bitmask, built once at import. The tables hold plain
+# ints: bitwise operations on IntFlag members construct new enum objects,
+# which costs more than the lookup itself.
+ROLE_CAPABILITIES: Dict[UserRole, int] = _compile_capabilities()
+_CREATE_MASKS: Dict[UserRole, int] = {role: int(capability) for role, capability in CREATE_CAPABILITY.items()}
+_LIST_USERS = int(Capability.LIST_USERS)
+
+
+def has_capability(role: UserRole, capability: Capability) -> bool:
+    """
+    Check if a role has every capability in the given mask.
+    
+    Args:
+        role: Role of the user performing the action
+        capability: Capability, or several combined with |
+        
+    Returns:
+        bool: True if the role has all of them, False otherwise
+    """
+    mask = int(capability)
+    return ROLE_CAPABILITIES[role] & mask == mask
+
+
 def check_role_permissions(actor_role: UserRole, target_role: UserRole) -> bool:
     """
     Check if a user with actor_role has permission to manage users with target_role.
@@ -32,7 +101,7 @@ def check_role_permissions(actor_role: UserRole, target_role: UserRole) -> bool:
     Returns:
         bool: True if actor has permission to manage target, False otherwise
     """
-    return target_role in ROLE_HIERARCHY[actor_role]
+    return ROLE_CAPABILITIES[actor_role] & _CREATE_MASKS[target_role] != 0
 
 
 def can_list_users(user_role: UserRole) -> bool:
@@ -45,4 +114,4 @@ def can_list_users(user_role: UserRole) -> bool:
     Returns:
         bool: True if the user can list all users, False otherwise
     """
-    return user_role in [UserRole.SUPER_ADMIN, UserRole.MANAGER]
\ No newline at end of file
+    return ROLE_CAPABILITIES[user_role] & _LIST_USERS != 0
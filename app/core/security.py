@@ -1,5 +1,10 @@
+import asyncio
+import hashlib
+import time
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional
 
 import jwt
 from passlib.context import CryptContext
@@ -7,6 +12,10 @@ import os
 from fastapi.security import OAuth2PasswordBearer
 
 from app.config import settings
+from app.core.exceptions import service_unavailable_exception
+from app.core.cache import TTLCache
+from app.core.metrics import Counter, Gauge, watch_cache
+from app.schemas.token import TokenPayload
 
 # JWT settings
 ALGORITHM = settings.ALGORITHM
@@ -27,6 +36,126 @@ def get_password_hash(password: str) -> str:
     """Generate a password hash."""
     return pwd_context.hash(password)
 
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification on a bounded worker pool.
+
+    bcrypt is deliberately slow, so running it inline blocks the event loop
+    for every other request on the worker. Jobs are handed to a thread or
+    process pool instead, and callers are rejected with a 503 once more than
+    ``max_pending`` jobs are queued or running.
+    """
+
+    def __init__(self, executor_type: str, workers: int, max_pending: int):
+        if executor_type not in ("thread", "process"):
+            raise ValueError(f"Unsupported password hash executor: {executor_type}")
+        self.executor_type = executor_type
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Optional[Executor] = None
+
+    @property
+    def executor(self) -> Executor:
+        """Create the worker pool on first use."""
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    async def run(self, func, *args):
+        """
+        Run a hashing function on the pool.
+
+        Args:
+            func: Module-level callable (must be picklable for process pools)
+            *args: Arguments passed to func
+
+        Returns:
+            The return value of func
+
+        Raises:
+            HTTPException: 503 when the pool queue is saturated
+        """
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise service_unavailable_exception
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        """Stop the worker pool, waiting for running jobs to finish."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    executor_type=settings.PASSWORD_HASH_EXECUTOR,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
+Gauge(
+    "password_hash_pending", "bcrypt jobs queued or running on the hashing pool",
+    callback=lambda: {(): password_hasher.pending}
+)
+Counter(
+    "password_hash_rejected_total", "bcrypt jobs rejected with 503 because the pool was saturated",
+    callback=lambda: {(): password_hasher.rejected}
+)
+
+# Pool slots bulk hashing may hold at once; the rest stay free for logins
+_bulk_hash_slots = asyncio.Semaphore(max(1, password_hasher.workers - 1))
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash without blocking the event loop."""
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Generate a password hash without blocking the event loop."""
+    return await password_hasher.run(get_password_hash, password)
+
+
+def get_password_hashes(passwords: List[str]) -> List[str]:
+    """Generate password hashes for a batch of passwords."""
+    return [pwd_context.hash(password) for password in passwords]
+
+
+async def get_password_hashes_async(passwords: List[str]) -> List[str]:
+    """
+    Hash many passwords on the pool without starving interactive requests.
+
+    The batch is hashed in chunks of PASSWORD_HASH_BATCH_SIZE, and bulk jobs
+    (of every caller together) hold at most `workers - 1` pool slots, so a
+    login never waits behind more than one chunk of an import.
+    """
+    if not passwords:
+        return []
+    batch_size = settings.PASSWORD_HASH_BATCH_SIZE
+
+    async def hash_chunk(chunk: List[str]) -> List[str]:
+        async with _bulk_hash_slots:
+            return await password_hasher.run(get_password_hashes, chunk)
+
+    results = await asyncio.gather(
+        *(hash_chunk(passwords[i:i + batch_size]) for i in range(0, len(passwords), batch_size))
+    )
+    return [hashed for chunk in results for hashed in chunk]
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT token with the given data and expiration."""
     to_encode = data.copy()
@@ -37,10 +166,47 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode.update({"exp": expire})
+    to_encode.setdefault("jti", uuid.uuid4().hex)
     
     encoded_jwt = jwt.encode(
         to_encode, 
         settings.SECRET_KEY, 
         algorithm=settings.ALGORITHM
     )
-    return encoded_jwt
\ No newline at end of file
+    return encoded_jwt
+
+# Decoded tokens keyed by SHA-256 of the raw token. Entries expire at the
+# token's own exp claim, so the TTL only bounds how long an entry may live.
+token_cache = TTLCache(
+    max_size=settings.TOKEN_CACHE_MAX_SIZE if settings.TOKEN_CACHE_ENABLED else 0,
+    ttl_seconds=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
+watch_cache("token", token_cache)
+
+def decode_access_token(token: str) -> TokenPayload:
+    """
+    Verify a JWT and return its validated payload.
+
+    Repeat lookups of the same token are served from token_cache, skipping
+    the signature check and pydantic validation until the token expires.
+
+    Args:
+        token: Encoded JWT from the Authorization header
+
+    Returns:
+        TokenPayload: Validated token claims
+
+    Raises:
+        PyJWTError: If the token is invalid or expired
+        ValidationError: If the claims do not match TokenPayload
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    token_data = token_cache.get(key)
+    if token_data is not None and token_data.exp > time.time():
+        return token_data
+
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    token_data = TokenPayload(**payload)
+    if token_data.exp is not None:
+        token_cache.set(key, token_data, ttl_seconds=token_data.exp - time.time())
+    return token_data
@@ -0,0 +1,186 @@
+import asyncio
+import functools
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from fastapi.routing import APIRoute
+
+from app.config import settings
+from app.core.metrics import Histogram
+
+
+class RequestTimings:
+    """Phase durations and database round trips collected for one request."""
+
+    __slots__ = ("started", "phases", "db_queries", "db_seconds", "endpoint_finished")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.endpoint_finished: Optional[float] = None
+
+    def add(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def server_timing(self, total: float) -> str:
+        """Render the phases as a Server-Timing header value (durations in ms)."""
+        metrics = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.phases.items()]
+        metrics.append(f'db;dur={self.db_seconds * 1000:.2f};desc="{self.db_queries} queries"')
+        metrics.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(metrics)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+# Aggregated per phase across all requests handled by this worker
+request_phase_seconds = Histogram(
+    "request_phase_seconds", "Request time spent per phase (Server-Timing)", ("phase",)
+)
+
+
+class _Phase:
+    __slots__ = ("timings", "name", "started")
+
+    def __init__(self, timings: RequestTimings, name: str):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timings.add(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+def phase(name: str):
+    """
+    Time a block of code as a named phase of the current request.
+
+    Outside an instrumented request (timing disabled) this returns a shared
+    no-op context manager, so instrumented code costs one ContextVar lookup.
+
+    Args:
+        name: Phase name as it should appear in the Server-Timing header
+    """
+    timings = _current.get()
+    if timings is None:
+        return _NULL_PHASE
+    return _Phase(timings, name)
+
+
+def record_query(seconds: float, failed: bool) -> None:
+    """QueryObserver counting SQL round trips and their duration for the current request."""
+    timings = _current.get()
+    if timings is not None:
+        timings.db_queries += 1
+        timings.db_seconds += seconds
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware that times each HTTP request by phase.
+
+    Adds a Server-Timing header to the response and feeds the per-phase
+    histograms returned by get_timing_stats(). Only installed when
+    SERVER_TIMING_ENABLED is set.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                total = time.perf_counter() - timings.started
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.server_timing(total).encode()))
+                message = {**message, "headers": headers}
+
+                for name, seconds in timings.phases.items():
+                    request_phase_seconds.observe(seconds, (name,))
+                request_phase_seconds.observe(timings.db_seconds, ("db",))
+                request_phase_seconds.observe(total, ("total",))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute that records "endpoint" and "serialize" phases.
+
+    "endpoint" covers the endpoint function body; "serialize" covers
+    response model validation and rendering after it returns. When timing
+    is disabled the stock route handler is used unchanged.
+    """
+
+    def get_route_handler(self):
+        if not settings.SERVER_TIMING_ENABLED:
+            return super().get_route_handler()
+
+        call = self.dependant.call
+        if asyncio.iscoroutinefunction(call):
+            @functools.wraps(call)
+            async def timed_endpoint(*args, **kwargs):
+                timings = _current.get()
+                if timings is None:
+                    return await call(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    return await call(*args, **kwargs)
+                finally:
+                    timings.endpoint_finished = time.perf_counter()
+                    timings.add("endpoint", timings.endpoint_finished - started)
+
+            self.dependant.call = timed_endpoint
+
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            response = await handler(request)
+            timings = _current.get()
+            if timings is not None and timings.endpoint_finished is not None:
+                timings.add("serialize", time.perf_counter() - timings.endpoint_finished)
+            return response
+
+        return timed_handler
+
+
+def get_timing_stats() -> Dict[str, Any]:
+    """Return the aggregated per-phase latency histograms."""
+    stats = {}
+    for (name,), (counts, total, count) in sorted(request_phase_seconds.samples()):
+        cumulative, buckets = 0, {}
+        for bound, bucket_count in zip(list(request_phase_seconds.buckets) + ["+Inf"], counts):
+            cumulative += bucket_count
+            buckets[str(bound)] = cumulative
+        stats[name] = {"count": count, "sum_seconds": round(total, 6), "buckets": buckets}
+    return stats
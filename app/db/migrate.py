@@ -0,0 +1,131 @@
+"""
+Apply database migrations and seed the default super admin.
+
+    python -m app.db.migrate              # upgrade to the latest revision
+    python -m app.db.migrate check        # exit 1 unless the database is up to date
+    python -m app.db.migrate current      # print the applied revision
+
+Run this once per deploy, before starting the API workers; the workers only
+check the applied revision at startup. On PostgreSQL the upgrade holds an
+advisory lock, so concurrent runs (e.g. one per container) apply the
+migrations once and the others wait, then find nothing to do.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.config import DB_CONNECTION_STRING
+from app.db.session import build_async_database_url
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+# Arbitrary application-wide key for pg_advisory_lock
+MIGRATION_LOCK_ID = 7242010
+
+
+def alembic_config() -> Config:
+    """Return an Alembic config pointing at app/db/migrations."""
+    config = Config()
+    config.set_main_option("script_location", MIGRATIONS_DIR)
+    return config
+
+
+def get_head_revision() -> Optional[str]:
+    """Return the latest revision of the migration scripts."""
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def get_current_revision(connection: Connection) -> Optional[str]:
+    """Return the revision applied to the database (None if never migrated)."""
+    return MigrationContext.configure(connection).get_current_revision()
+
+
+def _upgrade(connection: Connection, revision: str) -> None:
+    config = alembic_config()
+    config.attributes["connection"] = connection
+    command.upgrade(config, revision)
+
+
+async def upgrade(revision: str = "head") -> None:
+    """
+    Upgrade the database and make sure a super admin exists.
+
+    Args:
+        revision: Target revision (default: the latest one)
+    """
+    # Imported here: app.utils.db_utils imports this module for the startup check
+    from app.db.session import engine as session_engine
+    from app.utils.db_utils import ensure_super_admin
+
+    engine = create_async_engine(build_async_database_url(DB_CONNECTION_STRING), poolclass=NullPool)
+    try:
+        async with engine.connect() as connection:
+            locked = connection.dialect.name == "postgresql"
+            if locked:
+                logger.info("Waiting for the migration lock...")
+                await connection.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+                await connection.commit()
+            try:
+                await connection.run_sync(_upgrade, revision)
+                await connection.commit()
+                await ensure_super_admin()
+            finally:
+                if locked:
+                    await connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+                    await connection.commit()
+    finally:
+        await engine.dispose()
+        await session_engine.dispose()
+
+
+async def current() -> Optional[str]:
+    """Return the revision applied to the database."""
+    engine = create_async_engine(build_async_database_url(DB_CONNECTION_STRING), poolclass=NullPool)
+    try:
+        async with engine.connect() as connection:
+            return await connection.run_sync(get_current_revision)
+    finally:
+        await engine.dispose()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("action", nargs="?", default="upgrade", choices=["upgrade", "check", "current"])
+    parser.add_argument("--revision", default="head", help="Target revision for upgrade")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    if args.action == "upgrade":
+        asyncio.run(upgrade(args.revision))
+        return 0
+
+    revision = asyncio.run(current())
+    if args.action == "current":
+        print(revision)
+        return 0
+
+    head = get_head_revision()
+    if revision != head:
+        print(f"Database is at revision {revision}, latest is {head}")
+        return 1
+    print(f"Database is up to date ({head})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
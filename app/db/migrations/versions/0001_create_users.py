@@ -0,0 +1,81 @@
+"""create users table
+
+Baseline schema, as created by the startup DDL that used to run in every
+worker. Databases created that way are adopted in place: the enum type,
+table, columns, indexes and unique constraints are only created when they
+are missing.
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-03-21 00:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ROLES = ("super_admin", "manager", "team_head", "member")
+
+userrole = sa.Enum(*ROLES, name="userrole")
+# Column type that never emits CREATE TYPE; the type is created explicitly
+role_type = sa.Enum(*ROLES, name="userrole").with_variant(
+    postgresql.ENUM(*ROLES, name="userrole", create_type=False), "postgresql"
+)
+
+UNIQUE_COLUMNS = ("username", "email")
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    userrole.create(bind, checkfirst=True)
+
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("users"):
+        op.create_table(
+            "users",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("username", sa.String()),
+            sa.Column("email", sa.String()),
+            sa.Column("password", sa.String()),
+            sa.Column("role", role_type),
+            sa.Column("disabled", sa.Boolean(), server_default=sa.false()),
+        )
+        for column in UNIQUE_COLUMNS:
+            op.create_index(f"ix_users_{column}", "users", [column], unique=True)
+        return
+
+    existing = {column["name"] for column in inspector.get_columns("users")}
+    for column in (
+        sa.Column("username", sa.String()),
+        sa.Column("email", sa.String()),
+        sa.Column("password", sa.String()),
+        sa.Column("role", role_type),
+        sa.Column("disabled", sa.Boolean(), server_default=sa.false()),
+    ):
+        if column.name not in existing:
+            op.add_column("users", column)
+
+    indexes = {index["name"]: index for index in inspector.get_indexes("users")}
+    unique_columns = {
+        tuple(constraint["column_names"]) for constraint in inspector.get_unique_constraints("users")
+    }
+    unique_columns |= {tuple(index["column_names"]) for index in indexes.values() if index["unique"]}
+    for column in UNIQUE_COLUMNS:
+        if (column,) in unique_columns:
+            continue
+        if f"ix_users_{column}" in indexes:
+            op.create_unique_constraint(f"uq_users_{column}", "users", [column])
+        else:
+            op.create_index(f"ix_users_{column}", "users", [column], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_table("users")
+    userrole.drop(op.get_bind(), checkfirst=True)
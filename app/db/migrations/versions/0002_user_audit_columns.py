@@ -0,0 +1,59 @@
+"""add user audit and profile columns
+
+Adds created_at/updated_at/last_login and the optional profile columns of
+the users model. created_at is backfilled for existing rows and made NOT
+NULL, since the (created_at, id) keyset pagination order cannot skip over
+NULLs.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-03-21 00:00:01
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = (
+    ("created_at", sa.DateTime(timezone=True)),
+    ("updated_at", sa.DateTime(timezone=True)),
+    ("first_name", sa.String()),
+    ("last_name", sa.String()),
+    ("phone", sa.String()),
+    ("profile_picture", sa.String()),
+    ("last_login", sa.DateTime(timezone=True)),
+)
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    existing = {column["name"] for column in inspector.get_columns("users")}
+
+    for name, type_ in COLUMNS:
+        if name not in existing:
+            op.add_column("users", sa.Column(name, type_, nullable=True))
+
+    op.execute(sa.text("UPDATE users SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL"))
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.alter_column(
+            "created_at",
+            existing_type=sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        )
+
+    if "ix_users_created_at_id" not in {index["name"] for index in inspector.get_indexes("users")}:
+        op.create_index("ix_users_created_at_id", "users", ["created_at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_users_created_at_id", table_name="users")
+    with op.batch_alter_table("users") as batch_op:
+        for name, _ in reversed(COLUMNS):
+            batch_op.drop_column(name)
@@ -0,0 +1,61 @@
+"""add organizations, teams and the team closure table
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-03-21 00:00:02
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "organizations",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False, unique=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_table(
+        "teams",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column(
+            "organization_id", sa.String(),
+            sa.ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False,
+        ),
+        sa.Column("parent_id", sa.String(), sa.ForeignKey("teams.id", ondelete="CASCADE"), nullable=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("lead_id", sa.String(), sa.ForeignKey("users.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.UniqueConstraint("organization_id", "name", name="uq_teams_organization_id_name"),
+    )
+    op.create_index("ix_teams_organization_id", "teams", ["organization_id"])
+    op.create_index("ix_teams_lead_id", "teams", ["lead_id"])
+    op.create_table(
+        "team_closure",
+        sa.Column("ancestor_id", sa.String(), sa.ForeignKey("teams.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("descendant_id", sa.String(), sa.ForeignKey("teams.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("depth", sa.Integer(), nullable=False),
+    )
+    op.create_index("ix_team_closure_descendant_id", "team_closure", ["descendant_id", "ancestor_id"])
+    op.create_table(
+        "team_memberships",
+        sa.Column("team_id", sa.String(), sa.ForeignKey("teams.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_team_memberships_user_id", "team_memberships", ["user_id", "team_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("team_memberships")
+    op.drop_table("team_closure")
+    op.drop_table("teams")
+    op.drop_table("organizations")
@@ -0,0 +1,52 @@
+"""add user search indexes
+
+lower(column) text_pattern_ops btree indexes serve the case-insensitive
+prefix search; pg_trgm GIN indexes serve substring (ILIKE '%q%') and
+similarity (%) matching. Both are built CONCURRENTLY so the users table
+stays writable during the upgrade. CREATE EXTENSION pg_trgm needs a role
+allowed to create extensions (or the extension created beforehand).
+On other databases only the lower() indexes are created.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-03-21 00:00:03
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_COLUMNS = ("username", "email", "first_name", "last_name")
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        for column in SEARCH_COLUMNS:
+            op.create_index(f"ix_users_{column}_lower", "users", [sa.text(f"lower({column})")], if_not_exists=True)
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        for column in SEARCH_COLUMNS:
+            op.create_index(
+                f"ix_users_{column}_lower", "users", [sa.text(f"lower({column}) text_pattern_ops")],
+                postgresql_concurrently=True, if_not_exists=True,
+            )
+            op.create_index(
+                f"ix_users_{column}_trgm", "users", [column],
+                postgresql_using="gin", postgresql_ops={column: "gin_trgm_ops"},
+                postgresql_concurrently=True, if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    for column in SEARCH_COLUMNS:
+        op.drop_index(f"ix_users_{column}_lower", table_name="users", if_exists=True)
+        if op.get_bind().dialect.name == "postgresql":
+            op.drop_index(f"ix_users_{column}_trgm", table_name="users", if_exists=True)
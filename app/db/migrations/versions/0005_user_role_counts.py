@@ -0,0 +1,120 @@
+"""add the per-role user counter table
+
+user_role_counts holds one row per role ('' for users without a role) and
+is kept up to date by triggers on users, so unfiltered and role-filtered
+list totals are a primary key read instead of a COUNT(*) over the table.
+
+On PostgreSQL the triggers are statement level with transition tables, so
+a bulk import touches each counter row once per statement, and updates
+that do not change a role (last_login flushes) write nothing. The triggers
+are created before the counters are filled; CREATE TRIGGER blocks writes
+to users until this migration commits, so no row is missed or counted twice.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-03-21 00:00:04
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+POSTGRES_FUNCTION = """
+CREATE FUNCTION user_role_counts_apply() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO user_role_counts (role, user_count)
+        SELECT COALESCE(role::text, ''), count(*) FROM new_users GROUP BY 1
+        ON CONFLICT (role) DO UPDATE SET user_count = user_role_counts.user_count + EXCLUDED.user_count;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO user_role_counts (role, user_count)
+        SELECT COALESCE(role::text, ''), -count(*) FROM old_users GROUP BY 1
+        ON CONFLICT (role) DO UPDATE SET user_count = user_role_counts.user_count + EXCLUDED.user_count;
+    ELSE
+        INSERT INTO user_role_counts (role, user_count)
+        SELECT role, sum(delta) FROM (
+            SELECT COALESCE(n.role::text, '') AS role, 1 AS delta
+            FROM new_users n JOIN old_users o ON o.id = n.id
+            WHERE n.role IS DISTINCT FROM o.role
+            UNION ALL
+            SELECT COALESCE(o.role::text, ''), -1
+            FROM new_users n JOIN old_users o ON o.id = n.id
+            WHERE n.role IS DISTINCT FROM o.role
+        ) AS changes GROUP BY role
+        ON CONFLICT (role) DO UPDATE SET user_count = user_role_counts.user_count + EXCLUDED.user_count;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+POSTGRES_TRIGGERS = (
+    "CREATE TRIGGER user_role_counts_insert AFTER INSERT ON users "
+    "REFERENCING NEW TABLE AS new_users FOR EACH STATEMENT EXECUTE FUNCTION user_role_counts_apply()",
+    "CREATE TRIGGER user_role_counts_delete AFTER DELETE ON users "
+    "REFERENCING OLD TABLE AS old_users FOR EACH STATEMENT EXECUTE FUNCTION user_role_counts_apply()",
+    "CREATE TRIGGER user_role_counts_update AFTER UPDATE ON users "
+    "REFERENCING OLD TABLE AS old_users NEW TABLE AS new_users FOR EACH STATEMENT EXECUTE FUNCTION user_role_counts_apply()",
+)
+
+# Row level equivalents for SQLite (development and benchmarks)
+SQLITE_TRIGGERS = (
+    """
+    CREATE TRIGGER user_role_counts_insert AFTER INSERT ON users BEGIN
+        INSERT INTO user_role_counts (role, user_count) VALUES (COALESCE(NEW.role, ''), 1)
+        ON CONFLICT (role) DO UPDATE SET user_count = user_count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER user_role_counts_delete AFTER DELETE ON users BEGIN
+        UPDATE user_role_counts SET user_count = user_count - 1 WHERE role = COALESCE(OLD.role, '');
+    END
+    """,
+    """
+    CREATE TRIGGER user_role_counts_update AFTER UPDATE OF role ON users
+    WHEN OLD.role IS NOT NEW.role BEGIN
+        UPDATE user_role_counts SET user_count = user_count - 1 WHERE role = COALESCE(OLD.role, '');
+        INSERT INTO user_role_counts (role, user_count) VALUES (COALESCE(NEW.role, ''), 1)
+        ON CONFLICT (role) DO UPDATE SET user_count = user_count + 1;
+    END
+    """,
+)
+
+TRIGGER_NAMES = ("user_role_counts_insert", "user_role_counts_delete", "user_role_counts_update")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_role_counts",
+        sa.Column("role", sa.String(), primary_key=True),
+        sa.Column("user_count", sa.BigInteger(), nullable=False, server_default="0"),
+    )
+
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(POSTGRES_FUNCTION)
+        for statement in POSTGRES_TRIGGERS:
+            op.execute(statement)
+        role = "COALESCE(role::text, '')"
+    else:
+        for statement in SQLITE_TRIGGERS:
+            op.execute(statement)
+        role = "COALESCE(role, '')"
+
+    op.execute(
+        f"INSERT INTO user_role_counts (role, user_count) SELECT {role}, count(*) FROM users GROUP BY 1"
+    )
+
+
+def downgrade() -> None:
+    postgres = op.get_bind().dialect.name == "postgresql"
+    for name in TRIGGER_NAMES:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}" + (" ON users" if postgres else ""))
+    if postgres:
+        op.execute("DROP FUNCTION IF EXISTS user_role_counts_apply()")
+    op.drop_table("user_role_counts")
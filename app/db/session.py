@@ -1,22 +1,102 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+import asyncio
+import logging
+import time
+from typing import Optional, Type
+
+from fastapi import Depends, Request
+from jwt.exceptions import PyJWTError
+from pydantic import ValidationError
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
 from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from urllib.parse import urlparse
+from sqlalchemy.pool import Pool
+
+from app.config import settings, DB_CONNECTION_STRING
+from app.db.pool import InstrumentedAsyncQueuePool, InstrumentedReplicaPool, get_pool_status
+from app.core.cache import TTLCache
+from app.core.metrics import Counter, Gauge
+from app.core.security import decode_access_token
+
+logger = logging.getLogger(__name__)
+
+
+def build_async_database_url(database_url: str) -> URL:
+    """
+    Convert a libpq style DATABASE_URL into an asyncpg SQLAlchemy URL.
 
-from app.config import DB_CONNECTION_STRING
+    asyncpg does not understand the libpq ``sslmode`` parameter, so it is
+    translated to asyncpg's ``ssl`` argument (falling back to DB_SSL_MODE).
+    URLs that already name another async driver (e.g. ``sqlite+aiosqlite``,
+    used as a local stand-in by the benchmarks) are returned unchanged.
+    """
+    url = make_url(database_url)
+    if url.get_backend_name() != "postgresql":
+        return url
+    query = dict(url.query)
+    ssl_mode = query.pop("sslmode", None) or settings.DB_SSL_MODE
+    if ssl_mode and ssl_mode != "disable":
+        query["ssl"] = ssl_mode
+    return url.set(drivername="postgresql+asyncpg", query=query)
+
+
+def create_database_engine(
+    database_url: str,
+    poolclass: Type[Pool] = InstrumentedAsyncQueuePool,
+    pool_size: int = settings.DB_POOL_SIZE,
+    max_overflow: int = settings.DB_MAX_OVERFLOW
+) -> AsyncEngine:
+    """Create an async engine with the pool and driver settings from Settings."""
+    url = build_async_database_url(database_url)
+    if url.get_backend_name() != "postgresql":
+        return create_async_engine(url, echo=settings.DB_ECHO)
+
+    return create_async_engine(
+        url,
+        echo=settings.DB_ECHO,
+        poolclass=poolclass,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
+    )
 
-# Parse the connection string
-parsed_url = urlparse(DB_CONNECTION_STRING)
 
 # Create async SQLAlchemy engine
-engine = create_async_engine(
-    f"postgresql+asyncpg://{parsed_url.username}:{parsed_url.password}@{parsed_url.hostname}{parsed_url.path}?ssl=require",
-    echo=True
-)
+engine = create_database_engine(DB_CONNECTION_STRING)
+
+
+def _pool_stat(key: str):
+    return lambda: {(): get_pool_status(engine.pool).get(key, 0)}
+
+
+Gauge("db_pool_size", "Connections the pool keeps open", callback=_pool_stat("size"))
+Gauge("db_pool_checked_out", "Connections currently checked out", callback=_pool_stat("checked_out"))
+Gauge("db_pool_overflow", "Overflow connections in use (negative while below pool size)", callback=_pool_stat("overflow"))
+Counter("db_pool_checkouts_total", "Connection checkouts", callback=_pool_stat("checkouts"))
+Counter("db_pool_timeouts_total", "Checkouts that timed out waiting for a connection", callback=_pool_stat("timeouts"))
+Counter("db_pool_wait_seconds_total", "Time spent waiting for a connection", callback=_pool_stat("wait_seconds_total"))
 
 # Create async session factory
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
+# Optional read replica with its own pool, used through get_read_db
+replica_engine = (
+    create_database_engine(
+        settings.DATABASE_REPLICA_URL,
+        InstrumentedReplicaPool,
+        settings.DB_REPLICA_POOL_SIZE,
+        settings.DB_REPLICA_MAX_OVERFLOW,
+    )
+    if settings.DATABASE_REPLICA_URL else None
+)
+replica_session_maker = (
+    async_sessionmaker(replica_engine, expire_on_commit=False) if replica_engine is not None else None
+)
+
 Base = declarative_base()
 
 # Async context manager for database sessions
@@ -25,4 +105,84 @@ async def get_db():
         try:
             yield session
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
+
+
+# Ids of users that wrote, or were written to, within READ_YOUR_WRITES_SECONDS.
+# Per worker, like the other in-process caches.
+recent_writes = TTLCache(max_size=settings.USER_CACHE_MAX_SIZE, ttl_seconds=settings.READ_YOUR_WRITES_SECONDS)
+
+read_sessions_total = Counter(
+    "db_read_sessions_total", "Sessions opened by get_read_db, by where they were routed", ("route",)
+)
+
+# Monotonic time before which get_read_db does not try the replica again
+_replica_retry_at = 0.0
+
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def mark_recent_write(user_id: str) -> None:
+    """Send reads made by this user to the primary for READ_YOUR_WRITES_SECONDS."""
+    if replica_engine is not None:
+        recent_writes.set(user_id, True)
+
+
+def _request_user_id(request: Request) -> Optional[str]:
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return decode_access_token(token).sub
+    except (PyJWTError, ValidationError):
+        return None
+
+
+async def _open_replica_session() -> Optional[AsyncSession]:
+    global _replica_retry_at
+    if time.monotonic() < _replica_retry_at:
+        return None
+    session = replica_session_maker()
+    try:
+        await session.connection()
+    except (OSError, SQLAlchemyError, asyncio.TimeoutError) as e:
+        await session.close()
+        _replica_retry_at = time.monotonic() + settings.DB_REPLICA_RETRY_SECONDS
+        logger.warning(f"Read replica unavailable, using the primary: {str(e)}")
+        return None
+    return session
+
+
+async def get_read_db(request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Session for read-only queries, on the replica when one is configured.
+
+    Falls back to the primary for non-safe methods, for users in the
+    read-your-writes window (see mark_recent_write) and, for
+    DB_REPLICA_RETRY_SECONDS, after the replica failed to connect. Primary
+    reads reuse the request's get_db session (which only connects on first
+    use), so a request never holds two primary connections.
+    """
+    if replica_session_maker is None:
+        yield db
+        return
+
+    session = None
+    if request.method not in SAFE_METHODS:
+        route = "primary"
+    else:
+        user_id = _request_user_id(request)
+        if user_id is not None and recent_writes.get(user_id):
+            route = "sticky"
+        else:
+            session = await _open_replica_session()
+            route = "replica" if session is not None else "fallback"
+    read_sessions_total.inc((route,))
+
+    if session is None:
+        yield db
+        return
+    try:
+        yield session
+    finally:
+        await session.close()
@@ -1,36 +1,53 @@
 # app/main.py
 from fastapi import FastAPI, Request, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from typing import List
 import logging
 
-from app.db.session import engine
-from app.utils.db_utils import verify_and_update_schema, ensure_super_admin
+from app.db.session import engine, replica_engine
+from app.core.security import password_hasher
+from app.services.last_login_service import last_login_recorder
+from app.services.token_revocation_service import revoked_tokens
+from app.utils.db_utils import check_schema_version
 from app.api.v1.router import router as api_v1_router
 from app.config import settings
-from app.core.exceptions import APIException
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+from app.core.exceptions import APIException, UserExistsError
+from app.core.timing import ServerTimingMiddleware, record_query as record_query_timing
+from app.core.metrics import (
+    MetricsMiddleware, QueryObserver, generate_latest, install_query_listeners, multiprocess_collector,
+    record_query as record_query_metrics
 )
+from app.utils.logging import LoggerFactory
+
+# Configure logging: every handler writes from a queue listener thread
+LoggerFactory.configure_root(logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Lifespan event handler
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Database setup and verification
+    # Startup: Check the schema version (migrations run via app.db.migrate)
     logger.info("Starting application")
-    await verify_and_update_schema()
-    await ensure_super_admin()
+    await check_schema_version()
+    await revoked_tokens.start()
+    last_login_recorder.start()
+    if multiprocess_collector is not None:
+        multiprocess_collector.start()
     
     yield
     
     # Shutdown: Cleanup
     logger.info("Shutting down application")
+    if multiprocess_collector is not None:
+        await multiprocess_collector.stop()
+    await last_login_recorder.stop()
+    await revoked_tokens.stop()
+    password_hasher.shutdown()
     await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
 
 # Create FastAPI application
 app = FastAPI(
@@ -51,6 +68,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+query_observers: List[QueryObserver] = []
+
+# Per-request phase timing (Server-Timing header), opt-in
+if settings.SERVER_TIMING_ENABLED:
+    query_observers.append(record_query_timing)
+    app.add_middleware(ServerTimingMiddleware)
+
+# Prometheus metrics: request latency per route, in-flight requests, SQL statements
+if settings.METRICS_ENABLED:
+    query_observers.append(record_query_metrics)
+    app.add_middleware(MetricsMiddleware)
+
+# One pair of SQL listeners per engine feeds both of the above
+if query_observers:
+    install_query_listeners(engine.sync_engine, query_observers)
+    if replica_engine is not None:
+        install_query_listeners(replica_engine.sync_engine, query_observers)
+
 # Exception handler for custom API exceptions
 @app.exception_handler(APIException)
 async def api_exception_handler(request: Request, exc: APIException):
@@ -59,10 +94,24 @@ async def api_exception_handler(request: Request, exc: APIException):
         content={"detail": exc.detail},
     )
 
+# Unique username/email violations detected by the services
+@app.exception_handler(UserExistsError)
+async def user_exists_exception_handler(request: Request, exc: UserExistsError):
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={"detail": str(exc)},
+    )
+
 # Include API router with version prefix
 app.include_router(api_v1_router, prefix=settings.API_V1_PREFIX)
 
 # Health check endpoint
 @app.get("/health", status_code=status.HTTP_200_OK, tags=["health"])
 async def health_check():
-    return {"status": "ok", "version": settings.VERSION}
\ No newline at end of file
+    return {"status": "ok", "version": settings.VERSION}
+
+# Prometheus metrics endpoint
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+    async def metrics():
+        return PlainTextResponse(generate_latest(), media_type="text/plain; version=0.0.4")
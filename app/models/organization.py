@@ -0,0 +1,60 @@
+import uuid
+from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.sql import func
+
+from app.db.session import Base
+
+
+class Organization(Base):
+    __tablename__ = "organizations"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    name = Column(String, unique=True, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class Team(Base):
+    """
+    A team inside an organization. Teams nest (manager -> team_head -> member);
+    parent_id is the direct parent, TeamClosure holds every ancestor.
+    """
+    __tablename__ = "teams"
+    __table_args__ = (
+        UniqueConstraint("organization_id", "name", name="uq_teams_organization_id_name"),
+    )
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    organization_id = Column(String, ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False, index=True)
+    parent_id = Column(String, ForeignKey("teams.id", ondelete="CASCADE"), nullable=True)
+    name = Column(String, nullable=False)
+    # Manager or team head responsible for the team (and every team below it)
+    lead_id = Column(String, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class TeamClosure(Base):
+    """
+    Closure table of the team hierarchy: one row per (ancestor, descendant)
+    pair, including each team paired with itself at depth 0. Subtree and
+    ancestor checks are single lookups on the primary key or on
+    ix_team_closure_descendant_id instead of recursive walks.
+    """
+    __tablename__ = "team_closure"
+    __table_args__ = (
+        Index("ix_team_closure_descendant_id", "descendant_id", "ancestor_id"),
+    )
+
+    ancestor_id = Column(String, ForeignKey("teams.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id = Column(String, ForeignKey("teams.id", ondelete="CASCADE"), primary_key=True)
+    depth = Column(Integer, nullable=False)
+
+
+class TeamMembership(Base):
+    __tablename__ = "team_memberships"
+    __table_args__ = (
+        Index("ix_team_memberships_user_id", "user_id", "team_id"),
+    )
+
+    team_id = Column(String, ForeignKey("teams.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,49 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+
+from app.db.session import Base
+
+
+class RevokedToken(Base):
+    """
+    An access token revoked before its expiry, by its jti claim.
+
+    Rows are only needed until expires_at; after that the token is rejected
+    by its own exp claim and the row is deleted.
+    """
+    __tablename__ = "revoked_tokens"
+    __table_args__ = (
+        # Incremental refresh of the in-memory revocation lists
+        Index("ix_revoked_tokens_revoked_at", "revoked_at"),
+        Index("ix_revoked_tokens_expires_at", "expires_at"),
+    )
+
+    jti = Column(String, primary_key=True)
+    user_id = Column(String, nullable=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    revoked_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class RefreshToken(Base):
+    """
+    A refresh token, stored as the SHA-256 of the opaque token string.
+
+    Each login starts a family; every refresh marks the presented token used
+    and issues its successor in the same family. Presenting a used token
+    again means it was stolen (or replayed), so the whole family is revoked.
+    """
+    __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        Index("ix_refresh_tokens_family_id", "family_id"),
+        Index("ix_refresh_tokens_user_id", "user_id"),
+        Index("ix_refresh_tokens_expires_at", "expires_at"),
+    )
+
+    id = Column(String, primary_key=True)
+    token_hash = Column(String, unique=True, nullable=False)
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    family_id = Column(String, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    used_at = Column(DateTime(timezone=True), nullable=True)
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
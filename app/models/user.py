@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, Boolean, Enum as SQLAlchemyEnum, DateTime
+from sqlalchemy import Column, String, Boolean, BigInteger, Enum as SQLAlchemyEnum, DateTime, Index
 from sqlalchemy.sql import func
 
 # Import Base directly from session instead of base.py
@@ -8,16 +8,21 @@ from app.core.roles import UserRole
 
 class User(Base):  # Changed class name to match what's expected in db_utils.py
     __tablename__ = "users"
+    __table_args__ = (
+        # Keyset pagination order for user listings
+        Index("ix_users_created_at_id", "created_at", "id"),
+    )
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     username = Column(String, unique=True, index=True)
     email = Column(String, unique=True, index=True)
-    password_hash = Column(String)  # Changed from password to password_hash to match db_utils
-    role = Column(SQLAlchemyEnum(UserRole, name="userrole"))
-    is_active = Column(Boolean, default=True)  # Changed from disabled to is_active
+    password = Column(String)  # bcrypt hash, column name matches db_utils and app_main
+    # Store enum values ("super_admin"), matching the userrole type in the database
+    role = Column(SQLAlchemyEnum(UserRole, name="userrole", values_callable=lambda roles: [role.value for role in roles]))
+    disabled = Column(Boolean, default=False)
     
     # Audit fields
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Additional fields for future expansion
@@ -28,4 +33,11 @@ class User(Base):  # Changed class name to match what's expected in db_utils.py
     last_login = Column(DateTime(timezone=True), nullable=True)
 
 # Create an alias for backward compatibility if needed
-UserModel = User
\ No newline at end of file
+UserModel = User
+
+class UserRoleCount(Base):
+    """Number of users per role ('' for no role), maintained by triggers on users (migration 0005)"""
+    __tablename__ = "user_role_counts"
+    
+    role = Column(String, primary_key=True)
+    user_count = Column(BigInteger, nullable=False, server_default="0")
\ No newline at end of file
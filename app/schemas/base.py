@@ -0,0 +1,21 @@
+# app/schemas/base.py
+from typing import Generic, List, Optional, TypeVar
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+# Pagination metadata shared by offset and cursor (keyset) pages
+class PaginationMeta(BaseModel):
+    page: Optional[int] = None
+    page_size: int
+    total_items: Optional[int] = None
+    total_is_exact: Optional[bool] = None  # False when total_items is a cached snapshot
+    total_pages: Optional[int] = None
+    has_previous: bool
+    has_next: bool
+    next_cursor: Optional[str] = None
+
+# Generic paginated response envelope
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    pagination: PaginationMeta
@@ -0,0 +1,33 @@
+# app/schemas/organization.py
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel, Field
+
+class OrganizationCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100)
+
+class Organization(OrganizationCreate):
+    id: str
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class TeamCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100)
+    parent_id: Optional[str] = None
+    lead_id: Optional[str] = None
+
+# Only the fields that are sent are changed; "parent_id": null moves the team to the top level
+class TeamUpdate(BaseModel):
+    name: Optional[str] = Field(None, min_length=1, max_length=100)
+    parent_id: Optional[str] = None
+    lead_id: Optional[str] = None
+
+class Team(TeamCreate):
+    id: str
+    organization_id: str
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -5,7 +5,18 @@ from typing import Optional
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+
+class TokenRefresh(BaseModel):
+    refresh_token: str
 
 
 class TokenPayload(BaseModel):
     sub: Optional[str] = None
+    exp: Optional[int] = None
+    jti: Optional[str] = None  # unique token id, used to revoke it
+
+
+class TokenRevoke(BaseModel):
+    token: str
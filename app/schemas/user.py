@@ -1,6 +1,6 @@
 # app/schemas/user.py
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, EmailStr, Field
 
 from app.core.roles import UserRole
@@ -50,6 +50,21 @@ class User(UserBase):
     profile_picture: Optional[str] = None
     last_login: Optional[datetime] = None
 
+# Search hit; score is only set in ranked mode
+class UserSearchResult(User):
+    score: Optional[float] = None
+
 # Full user details (for admin use)
 class UserAdminView(User):
-    pass  # Add any admin-only fields here
\ No newline at end of file
+    pass  # Add any admin-only fields here
+
+# Per-row failure in a bulk import
+class UserImportError(BaseModel):
+    row: int
+    username: Optional[str] = None
+    error: str
+
+# Bulk import summary
+class UserImportResult(BaseModel):
+    created: int
+    errors: List[UserImportError]
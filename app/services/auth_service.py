@@ -3,8 +3,9 @@ from datetime import datetime, timedelta
 from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 import jwt
+import uuid
 
-from app.core.security import verify_password
+from app.core.security import verify_password_async
 from app.config import settings
 from app.schemas.user import User
 from app.services.user_service import get_user_by_username
@@ -18,7 +19,7 @@ async def authenticate_user(
     user = await get_user_by_username(db, username)
     if not user:
         return None
-    if not verify_password(password, user.password):
+    if not await verify_password_async(password, user.password):
         return None
     
     return User.model_validate(user)
@@ -27,7 +28,7 @@ def create_user_token(
     data: dict, 
     expires_delta: Optional[timedelta] = None
 ) -> str:
-    """Create a JWT token for a user"""
+    """Create a JWT token for a user, with a unique jti claim so it can be revoked"""
     to_encode = data.copy()
     
     if expires_delta:
@@ -36,6 +37,7 @@ def create_user_token(
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode.update({"exp": expire})
+    to_encode.setdefault("jti", uuid.uuid4().hex)
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     
     return encoded_jwt
\ No newline at end of file
@@ -0,0 +1,58 @@
+# app/services/count_service.py
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from typing import NamedTuple, Optional
+
+from app.models.user import UserModel, UserRoleCount
+from app.core.roles import UserRole
+from app.core.cache import TTLCache
+from app.core.metrics import watch_cache
+from app.config import settings
+from app.services.user_service import user_filters
+
+class UserCount(NamedTuple):
+    total: int
+    exact: bool
+
+# Exact counts of organization/team/lead scoped listings keyed by filter
+# values. A cached count may miss writes made since it was taken, so it is
+# reported as not exact.
+count_cache = TTLCache(
+    max_size=settings.USER_COUNT_CACHE_MAX_SIZE,
+    ttl_seconds=settings.USER_COUNT_CACHE_TTL_SECONDS,
+)
+watch_cache("user_count", count_cache)
+
+async def count_users(
+    db: AsyncSession,
+    role: Optional[UserRole] = None,
+    organization_id: Optional[str] = None,
+    team_id: Optional[str] = None,
+    lead_id: Optional[str] = None
+) -> UserCount:
+    """
+    Count the users get_all_users pages through with the same filters.
+
+    Unscoped counts (optionally by role) sum the trigger-maintained
+    user_role_counts rows, which is exact and never touches users. Scoped
+    counts run COUNT(*) over the filtered users once per
+    USER_COUNT_CACHE_TTL_SECONDS and are served from count_cache meanwhile.
+    """
+    if organization_id is None and team_id is None and lead_id is None:
+        query = select(func.coalesce(func.sum(UserRoleCount.user_count), 0))
+        if role:
+            query = query.where(UserRoleCount.role == role.value)
+        result = await db.execute(query)
+        return UserCount(int(result.scalar()), True)
+
+    key = (role, organization_id, team_id, lead_id)
+    total = count_cache.get(key)
+    if total is not None:
+        return UserCount(total, False)
+
+    result = await db.execute(
+        select(func.count()).select_from(UserModel).where(*user_filters(role, organization_id, team_id, lead_id))
+    )
+    total = result.scalar()
+    count_cache.set(key, total)
+    return UserCount(total, True)
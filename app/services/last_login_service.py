@@ -0,0 +1,124 @@
+# app/services/last_login_service.py
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import DateTime, String, bindparam, column, update, values
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.config import settings
+from app.db.session import async_session_maker
+from app.models.user import UserModel
+from app.services.user_service import user_cache
+
+logger = logging.getLogger(__name__)
+
+
+class LastLoginRecorder:
+    """
+    Buffers last-login timestamps in memory and writes them in batches.
+
+    Login only records (user_id, timestamp) in a dict, keeping the latest
+    value per user, so no write transaction sits on the login path. A
+    background task flushes the buffer every `flush_interval` seconds with a
+    single UPDATE ... FROM (VALUES ...) per batch, and stop() flushes
+    whatever is left on shutdown.
+    """
+
+    def __init__(self, flush_interval: float, batch_size: int):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending: Dict[str, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, user_id: str, login_time: datetime) -> None:
+        """Remember a login, keeping only the most recent one per user."""
+        current = self._pending.get(user_id)
+        if current is None or login_time > current:
+            self._pending[user_id] = login_time
+
+    async def flush(self) -> int:
+        """
+        Write all buffered timestamps to the database.
+
+        Returns:
+            int: Number of users written
+        """
+        if not self._pending:
+            return 0
+
+        batch, self._pending = self._pending, {}
+        items = list(batch.items())
+        written = 0
+        try:
+            async with async_session_maker() as session:
+                dialect_name = (await session.connection()).dialect.name
+                for start in range(0, len(items), self.batch_size):
+                    chunk = items[start:start + self.batch_size]
+                    if dialect_name == "postgresql":
+                        await session.execute(self._build_update(chunk))
+                    else:
+                        # Without UPDATE ... FROM (VALUES ...), fall back to executemany
+                        await session.execute(
+                            update(UserModel.__table__)
+                            .where(UserModel.id == bindparam("user_id"))
+                            .values(last_login=bindparam("login_time"), updated_at=UserModel.updated_at),
+                            [{"user_id": user_id, "login_time": login_time} for user_id, login_time in chunk]
+                        )
+                    written += len(chunk)
+                await session.commit()
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to flush {len(items)} last login times: {str(e)}")
+            # Put the batch back unless a newer login arrived meanwhile
+            for user_id, login_time in items:
+                self.record(user_id, login_time)
+            return 0
+
+        for user_id, _ in items:
+            user_cache.invalidate(user_id)
+        return written
+
+    @staticmethod
+    def _build_update(items: List[Tuple[str, datetime]]):
+        rows = values(
+            column("id", String),
+            column("last_login", DateTime(timezone=True)),
+            name="logins"
+        ).data(items)
+        return (
+            update(UserModel.__table__)
+            .where(UserModel.id == rows.c.id)
+            # A login is not a profile change, so keep updated_at as it is
+            .values(last_login=rows.c.last_login, updated_at=UserModel.updated_at)
+        )
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Unexpected error flushing last login times: {str(e)}")
+
+    def start(self) -> None:
+        """Start the periodic flush task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic flush task and write anything still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+last_login_recorder = LastLoginRecorder(
+    flush_interval=settings.LAST_LOGIN_FLUSH_INTERVAL_SECONDS,
+    batch_size=settings.LAST_LOGIN_FLUSH_BATCH_SIZE,
+)
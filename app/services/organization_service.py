@@ -0,0 +1,210 @@
+# app/services/organization_service.py
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, delete, literal
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql.elements import ColumnElement
+from typing import List, Optional
+import uuid
+
+from app.models.organization import Organization as OrganizationModel, Team as TeamModel, TeamClosure, TeamMembership
+from app.models.user import UserModel
+from app.schemas.organization import OrganizationCreate, Organization, TeamCreate, TeamUpdate, Team
+
+async def create_organization(db: AsyncSession, org_data: OrganizationCreate) -> Organization:
+    """Create an organization"""
+    organization = OrganizationModel(id=str(uuid.uuid4()), name=org_data.name)
+    db.add(organization)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise ValueError("Organization name already exists")
+    await db.refresh(organization)
+    return Organization.model_validate(organization)
+
+async def list_organizations(db: AsyncSession) -> List[Organization]:
+    """Get all organizations ordered by name"""
+    result = await db.execute(select(OrganizationModel).order_by(OrganizationModel.name))
+    return [Organization.model_validate(org) for org in result.scalars().all()]
+
+async def get_team(db: AsyncSession, organization_id: str, team_id: str) -> Optional[TeamModel]:
+    """Get a team of the given organization"""
+    team = await db.get(TeamModel, team_id)
+    if team is None or team.organization_id != organization_id:
+        return None
+    return team
+
+async def list_teams(db: AsyncSession, organization_id: str) -> List[Team]:
+    """Get the teams of an organization ordered by name"""
+    result = await db.execute(
+        select(TeamModel).where(TeamModel.organization_id == organization_id).order_by(TeamModel.name)
+    )
+    return [Team.model_validate(team) for team in result.scalars().all()]
+
+async def is_team_ancestor(db: AsyncSession, ancestor_id: str, descendant_id: str) -> bool:
+    """Check whether a team is (or is below) another team with one primary key lookup"""
+    result = await db.execute(
+        select(literal(True)).where(
+            TeamClosure.ancestor_id == ancestor_id,
+            TeamClosure.descendant_id == descendant_id
+        )
+    )
+    return result.scalar() is not None
+
+async def _check_team_refs(db: AsyncSession, organization_id: str, parent_id: Optional[str], lead_id: Optional[str]) -> None:
+    if parent_id is not None and await get_team(db, organization_id, parent_id) is None:
+        raise ValueError("Parent team not found in this organization")
+    if lead_id is not None and await db.get(UserModel, lead_id) is None:
+        raise ValueError("Team lead not found")
+
+async def create_team(db: AsyncSession, organization_id: str, team_data: TeamCreate) -> Optional[Team]:
+    """
+    Create a team, below team_data.parent_id if given.
+
+    The closure rows are the parent's ancestor rows re-pointed at the new
+    team plus its own depth 0 row. Returns None if the organization does
+    not exist.
+    """
+    if await db.get(OrganizationModel, organization_id) is None:
+        return None
+    await _check_team_refs(db, organization_id, team_data.parent_id, team_data.lead_id)
+
+    team = TeamModel(id=str(uuid.uuid4()), organization_id=organization_id, **team_data.model_dump())
+    db.add(team)
+    try:
+        await db.flush()
+    except IntegrityError:
+        await db.rollback()
+        raise ValueError("Team name already exists in this organization")
+
+    await db.execute(insert(TeamClosure.__table__).values(ancestor_id=team.id, descendant_id=team.id, depth=0))
+    if team.parent_id is not None:
+        await db.execute(
+            insert(TeamClosure.__table__).from_select(
+                ["ancestor_id", "descendant_id", "depth"],
+                select(TeamClosure.ancestor_id, literal(team.id), TeamClosure.depth + 1)
+                .where(TeamClosure.descendant_id == team.parent_id)
+            )
+        )
+    await db.commit()
+    await db.refresh(team)
+    return Team.model_validate(team)
+
+async def _move_team(db: AsyncSession, team_id: str, parent_id: Optional[str]) -> None:
+    if parent_id is not None and await is_team_ancestor(db, team_id, parent_id):
+        raise ValueError("A team cannot be moved below itself")
+
+    subtree = select(TeamClosure.descendant_id).where(TeamClosure.ancestor_id == team_id)
+    # Drop the paths from the old ancestors into the subtree...
+    await db.execute(
+        delete(TeamClosure.__table__).where(
+            TeamClosure.descendant_id.in_(subtree.scalar_subquery()),
+            TeamClosure.ancestor_id.not_in(subtree.scalar_subquery())
+        )
+    )
+    # ...and connect every ancestor of the new parent to every team in the subtree
+    if parent_id is not None:
+        above, below = aliased(TeamClosure), aliased(TeamClosure)
+        await db.execute(
+            insert(TeamClosure.__table__).from_select(
+                ["ancestor_id", "descendant_id", "depth"],
+                select(above.ancestor_id, below.descendant_id, above.depth + below.depth + 1)
+                .select_from(above)
+                .join(below, below.ancestor_id == team_id)
+                .where(above.descendant_id == parent_id)
+            )
+        )
+
+async def update_team(
+    db: AsyncSession,
+    organization_id: str,
+    team_id: str,
+    team_data: TeamUpdate
+) -> Optional[Team]:
+    """Rename a team, change its lead or move it under another parent"""
+    team = await get_team(db, organization_id, team_id)
+    if team is None:
+        return None
+
+    update_data = team_data.model_dump(exclude_unset=True)
+    await _check_team_refs(db, organization_id, update_data.get("parent_id"), update_data.get("lead_id"))
+
+    if "parent_id" in update_data and update_data["parent_id"] != team.parent_id:
+        await _move_team(db, team_id, update_data["parent_id"])
+
+    for field, value in update_data.items():
+        setattr(team, field, value)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise ValueError("Team name already exists in this organization")
+    await db.refresh(team)
+    return Team.model_validate(team)
+
+async def delete_team(db: AsyncSession, organization_id: str, team_id: str) -> bool:
+    """Delete a team together with every team below it"""
+    if await get_team(db, organization_id, team_id) is None:
+        return False
+
+    result = await db.execute(select(TeamClosure.descendant_id).where(TeamClosure.ancestor_id == team_id))
+    team_ids = result.scalars().all()
+    await db.execute(delete(TeamMembership.__table__).where(TeamMembership.team_id.in_(team_ids)))
+    await db.execute(delete(TeamClosure.__table__).where(TeamClosure.descendant_id.in_(team_ids)))
+    await db.execute(delete(TeamModel.__table__).where(TeamModel.id.in_(team_ids)))
+    await db.commit()
+    return True
+
+async def add_team_member(db: AsyncSession, organization_id: str, team_id: str, user_id: str) -> bool:
+    """Add a user to a team (no-op if already a member); False if the team or user does not exist"""
+    if await get_team(db, organization_id, team_id) is None or await db.get(UserModel, user_id) is None:
+        return False
+    if await db.get(TeamMembership, (team_id, user_id)) is None:
+        await db.execute(insert(TeamMembership.__table__).values(team_id=team_id, user_id=user_id))
+        await db.commit()
+    return True
+
+async def remove_team_member(db: AsyncSession, organization_id: str, team_id: str, user_id: str) -> bool:
+    """Remove a user from a team"""
+    if await get_team(db, organization_id, team_id) is None:
+        return False
+    result = await db.execute(
+        delete(TeamMembership.__table__).where(
+            TeamMembership.team_id == team_id,
+            TeamMembership.user_id == user_id
+        )
+    )
+    await db.commit()
+    return result.rowcount > 0
+
+# Filters on UserModel for get_all_users. Each is one EXISTS probe per user
+# row on the team_memberships and team_closure primary keys.
+
+def in_organization(organization_id: str) -> ColumnElement[bool]:
+    """Users that are members of any team of the organization"""
+    return (
+        select(TeamMembership.user_id)
+        .join(TeamModel, TeamModel.id == TeamMembership.team_id)
+        .where(TeamMembership.user_id == UserModel.id, TeamModel.organization_id == organization_id)
+        .exists()
+    )
+
+def in_team_subtree(team_id: str) -> ColumnElement[bool]:
+    """Users that are members of the team or of any team below it"""
+    return (
+        select(TeamMembership.user_id)
+        .join(TeamClosure, TeamClosure.descendant_id == TeamMembership.team_id)
+        .where(TeamMembership.user_id == UserModel.id, TeamClosure.ancestor_id == team_id)
+        .exists()
+    )
+
+def led_by(lead_id: str) -> ColumnElement[bool]:
+    """Users in the subtree of any team the given manager or team head leads"""
+    return (
+        select(TeamMembership.user_id)
+        .join(TeamClosure, TeamClosure.descendant_id == TeamMembership.team_id)
+        .join(TeamModel, TeamModel.id == TeamClosure.ancestor_id)
+        .where(TeamMembership.user_id == UserModel.id, TeamModel.lead_id == lead_id)
+        .exists()
+    )
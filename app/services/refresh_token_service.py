@@ -0,0 +1,122 @@
+# app/services/refresh_token_service.py
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, update, func
+from typing import Optional, Tuple
+from datetime import datetime, timedelta, timezone
+import hashlib
+import logging
+import secrets
+import uuid
+
+from app.models.token import RefreshToken
+from app.schemas.user import User
+from app.core.metrics import Counter
+from app.config import settings
+from app.services.user_service import get_user_by_id
+
+logger = logging.getLogger(__name__)
+
+refresh_token_reuse_total = Counter(
+    "refresh_token_reuse_total", "Refresh tokens presented again after rotation (family revoked)"
+)
+
+def _hash_token(token: str) -> str:
+    # Tokens are 256 random bits, so a fast hash is enough; bcrypt would only
+    # bring back the cost refresh tokens exist to avoid
+    return hashlib.sha256(token.encode()).hexdigest()
+
+async def _insert_refresh_token(db: AsyncSession, user_id: str, family_id: str) -> str:
+    token = secrets.token_urlsafe(32)
+    await db.execute(
+        insert(RefreshToken.__table__).values(
+            id=str(uuid.uuid4()),
+            token_hash=_hash_token(token),
+            user_id=user_id,
+            family_id=family_id,
+            expires_at=datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        )
+    )
+    return token
+
+async def issue_refresh_token(db: AsyncSession, user_id: str) -> str:
+    """Start a new refresh token family for a login and return its first token"""
+    token = await _insert_refresh_token(db, user_id, str(uuid.uuid4()))
+    await db.commit()
+    return token
+
+async def _revoke_family(db: AsyncSession, family_id: str) -> None:
+    await db.execute(
+        update(RefreshToken.__table__)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=func.now())
+    )
+    await db.commit()
+
+async def rotate_refresh_token(db: AsyncSession, token: str) -> Optional[Tuple[User, str]]:
+    """
+    Exchange a refresh token for the user it belongs to and its successor.
+
+    The presented token is claimed with a conditional UPDATE, so of two
+    concurrent requests with the same token only one wins. A token that was
+    already used, or loses that race, is treated as stolen: it is counted in
+    refresh_token_reuse_total and its whole family is revoked. Returns None
+    if the token is unknown, expired, revoked or reused, or the user no
+    longer exists or is disabled.
+    """
+    result = await db.execute(
+        select(RefreshToken, (RefreshToken.expires_at > func.now()).label("live"))
+        .where(RefreshToken.token_hash == _hash_token(token))
+    )
+    row = result.first()
+    if row is None or row.RefreshToken.revoked_at is not None:
+        return None
+    refresh_token = row.RefreshToken
+    if not row.live and refresh_token.used_at is None:
+        # Expired before it was ever used; nothing suggests it was stolen
+        await db.rollback()
+        return None
+
+    claimed = await db.execute(
+        update(RefreshToken.__table__)
+        .where(
+            RefreshToken.id == refresh_token.id,
+            RefreshToken.used_at.is_(None),
+            RefreshToken.expires_at > func.now()
+        )
+        .values(used_at=func.now())
+    )
+    if claimed.rowcount == 0:
+        # Used before, or claimed by a concurrent request with the same token
+        refresh_token_reuse_total.inc()
+        logger.warning(f"Refresh token reuse detected for user {refresh_token.user_id}, revoking its family")
+        await _revoke_family(db, refresh_token.family_id)
+        return None
+
+    user = await get_user_by_id(db, refresh_token.user_id)
+    if user is None or user.disabled:
+        await db.rollback()
+        return None
+
+    successor = await _insert_refresh_token(db, user.id, refresh_token.family_id)
+    await db.commit()
+    return user, successor
+
+async def revoke_refresh_token(db: AsyncSession, token: str) -> bool:
+    """Revoke the family of a refresh token (logout); False if the token is unknown"""
+    result = await db.execute(
+        select(RefreshToken.family_id).where(RefreshToken.token_hash == _hash_token(token))
+    )
+    family_id = result.scalar()
+    if family_id is None:
+        return False
+    await _revoke_family(db, family_id)
+    return True
+
+async def revoke_user_refresh_tokens(db: AsyncSession, user_id: str) -> None:
+    """Revoke every refresh token of a user, e.g. after a password change"""
+    await db.execute(
+        update(RefreshToken.__table__)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=func.now())
+    )
+    await db.commit()
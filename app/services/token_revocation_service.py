@@ -0,0 +1,158 @@
+# app/services/token_revocation_service.py
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db.session import async_session_maker
+from app.models.token import RefreshToken, RevokedToken
+from app.schemas.token import TokenPayload
+
+logger = logging.getLogger(__name__)
+
+
+class TokenRevocationList:
+    """
+    This worker's copy of the revoked, not yet expired access token ids.
+
+    revoke() writes a row to revoked_tokens and applies it locally at once.
+    A background task pulls the rows other workers wrote every
+    `refresh_interval` seconds, reading only those revoked since the last
+    refresh (through ix_revoked_tokens_revoked_at), so get_current_user
+    checks a token with `jti in revoked_tokens`, a dict lookup, and never
+    queries. Entries are popped off an expiry heap as their tokens expire,
+    so the set only ever holds revocations from the last token lifetime.
+    Every `prune_interval` seconds the refresh also deletes expired rows of
+    revoked_tokens and refresh_tokens.
+    """
+
+    # Re-read this far behind the last revoked_at seen, so rows whose
+    # transaction committed after a later one are not skipped
+    REFRESH_OVERLAP = timedelta(seconds=10)
+
+    def __init__(self, refresh_interval: float, prune_interval: float):
+        self.refresh_interval = refresh_interval
+        self.prune_interval = prune_interval
+        self._expires_at: Dict[str, float] = {}
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._since: Optional[datetime] = None
+        self._pruned_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def __contains__(self, jti: Optional[str]) -> bool:
+        return jti in self._expires_at
+
+    def __len__(self) -> int:
+        return len(self._expires_at)
+
+    def _add(self, jti: str, expires_at: float) -> None:
+        if jti not in self._expires_at and expires_at > time.time():
+            self._expires_at[jti] = expires_at
+            heapq.heappush(self._expiry_heap, (expires_at, jti))
+
+    def _drop_expired(self) -> None:
+        now = time.time()
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            _, jti = heapq.heappop(self._expiry_heap)
+            del self._expires_at[jti]
+
+    async def revoke(self, db: AsyncSession, token_data: TokenPayload) -> None:
+        """Persist the revocation of a token and apply it to this worker immediately."""
+        try:
+            await db.execute(
+                insert(RevokedToken.__table__).values(
+                    jti=token_data.jti,
+                    user_id=token_data.sub,
+                    expires_at=datetime.fromtimestamp(token_data.exp, timezone.utc)
+                )
+            )
+            await db.commit()
+        except IntegrityError:
+            # Already revoked
+            await db.rollback()
+        self._add(token_data.jti, token_data.exp)
+
+    async def refresh(self) -> int:
+        """
+        Load the revocations recorded since the last refresh (all unexpired
+        ones on the first call) and drop expired entries.
+
+        Returns:
+            int: Number of rows read
+        """
+        query = select(RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at)
+        if self._since is None:
+            query = query.where(RevokedToken.expires_at > func.now())
+        else:
+            query = query.where(RevokedToken.revoked_at > self._since - self.REFRESH_OVERLAP)
+
+        async with async_session_maker() as session:
+            # Cursor on the database clock, which also sets revoked_at
+            now = (await session.execute(select(func.now()))).scalar()
+            rows = (await session.execute(query)).all()
+
+            if time.monotonic() - self._pruned_at >= self.prune_interval:
+                await session.execute(delete(RevokedToken.__table__).where(RevokedToken.expires_at < func.now()))
+                # Expired refresh tokens can no longer be used or replayed either
+                await session.execute(delete(RefreshToken.__table__).where(RefreshToken.expires_at < func.now()))
+                await session.commit()
+                self._pruned_at = time.monotonic()
+
+        for jti, expires_at, _ in rows:
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            self._add(jti, expires_at.timestamp())
+        if self._since is None or now > self._since:
+            self._since = now
+        self._drop_expired()
+        return len(rows)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except SQLAlchemyError as e:
+                logger.error(f"Failed to refresh revoked tokens: {str(e)}")
+            except Exception as e:
+                logger.error(f"Unexpected error refreshing revoked tokens: {str(e)}")
+
+    async def start(self) -> None:
+        """
+        Load the current revocations, then keep them in sync in the background.
+
+        A failed first load (e.g. revoked_tokens not migrated yet with
+        SCHEMA_VERSION_CHECK=warn) is logged instead of failing startup; the
+        background task retries it with a full load on every interval.
+        """
+        try:
+            await self.refresh()
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to load revoked tokens: {str(e)}")
+        except Exception as e:
+            logger.error(f"Unexpected error loading revoked tokens: {str(e)}")
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background refresh task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+revoked_tokens = TokenRevocationList(
+    refresh_interval=settings.TOKEN_REVOCATION_REFRESH_SECONDS,
+    prune_interval=settings.TOKEN_REVOCATION_PRUNE_SECONDS,
+)
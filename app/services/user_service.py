@@ -1,14 +1,35 @@
 # app/services/user_service.py
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text, select
-from typing import List, Optional
-from datetime import datetime
+from sqlalchemy import text, select, tuple_, insert, update, or_, and_, any_, bindparam, case, cast, func, literal, String, Float
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.sql.elements import ColumnElement
+from pydantic import TypeAdapter, ValidationError
+from typing import Any, AsyncIterator, List, Literal, Mapping, Optional, Sequence, Tuple
+from datetime import datetime, timezone
 import uuid
 
+from app.db.session import async_session_maker, mark_recent_write
 from app.models.user import UserModel
-from app.schemas.user import UserCreate, UserUpdate, User
-from app.core.security import get_password_hash, verify_password
+from app.schemas.user import UserCreate, UserUpdate, User, UserImportError, UserImportResult, UserSearchResult
+from app.core.security import get_password_hash_async, get_password_hashes_async, verify_password_async
+from app.core.exceptions import UserExistsError
 from app.core.roles import UserRole, check_role_permissions
+from app.core.cache import TTLCache
+from app.core.timing import phase
+from app.core.metrics import watch_cache
+from app.config import settings
+from app.services.organization_service import in_organization, in_team_subtree, led_by
+
+# Validated users keyed by id, read by get_current_user on every request.
+# Every write below must invalidate the entry so changes apply immediately,
+# and mark the user with mark_recent_write so the next lookup skips the replica.
+user_cache = TTLCache(
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+)
+watch_cache("user", user_cache)
 
 async def get_user_by_id(db: AsyncSession, user_id: str) -> Optional[User]:
     """Get a user by ID"""
@@ -28,92 +49,417 @@ async def get_user_by_email(db: AsyncSession, email: str) -> Optional[UserModel]
     result = await db.execute(select(UserModel).where(UserModel.email == email))
     return result.scalars().first()
 
+# Columns returned to clients, in User schema order (never includes password)
+EXPORT_COLUMNS = list(User.model_fields)
+RESPONSE_COLUMNS = [UserModel.__table__.c[column] for column in EXPORT_COLUMNS]
+user_list_adapter = TypeAdapter(List[User])
+
+def user_version(user: Any) -> Tuple[Any, ...]:
+    """
+    Values that change whenever a user's response representation does.
+    
+    Every write bumps updated_at except the batched last_login flush, which
+    keeps it, so last_login is part of the version too. Works on User models
+    and on get_user_rows rows alike.
+    """
+    return user.id, user.updated_at, user.last_login
+
+def user_filters(
+    role: Optional[UserRole] = None,
+    organization_id: Optional[str] = None,
+    team_id: Optional[str] = None,
+    lead_id: Optional[str] = None
+) -> List[ColumnElement[bool]]:
+    """WHERE clauses of a user listing, shared by get_user_rows and count_users"""
+    filters = []
+    if role:
+        filters.append(UserModel.role == role)
+    if organization_id is not None:
+        filters.append(in_organization(organization_id))
+    if team_id is not None:
+        filters.append(in_team_subtree(team_id))
+    if lead_id is not None:
+        filters.append(led_by(lead_id))
+    return filters
+
+def _after_created(after: Tuple[datetime, str], dialect_name: str) -> ColumnElement:
+    """`(created_at, id) > after`, with the timestamp bound in the stored format on SQLite"""
+    created_at, user_id = after
+    if dialect_name == "sqlite":
+        # SQLite keeps CURRENT_TIMESTAMP defaults as 'YYYY-MM-DD HH:MM:SS' text,
+        # while a bound datetime renders with '.ffffff' and sorts after every
+        # row of that second, so compare against the text the rows hold
+        if created_at.tzinfo is not None:
+            created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+        stored = created_at.strftime("%Y-%m-%d %H:%M:%S.%f" if created_at.microsecond else "%Y-%m-%d %H:%M:%S")
+        return tuple_(UserModel.created_at, UserModel.id) > tuple_(literal(stored), literal(user_id))
+    return tuple_(UserModel.created_at, UserModel.id) > after
+
+async def get_user_rows(
+    db: AsyncSession, 
+    skip: int = 0, 
+    limit: int = 100,
+    role: Optional[UserRole] = None,
+    after: Optional[Tuple[datetime, str]] = None,
+    organization_id: Optional[str] = None,
+    team_id: Optional[str] = None,
+    lead_id: Optional[str] = None
+) -> Sequence[Row]:
+    """
+    Get users ordered by (created_at, id) as rows of the response columns.
+    
+    Pass `after` (a keyset position) instead of `skip` for cursor pagination,
+    which uses the ix_users_created_at_id index and never scans skipped rows.
+    `organization_id`, `team_id` (including sub-teams) and `lead_id` (users
+    under a manager or team head) scope the list through the team closure
+    table.
+    
+    No ORM objects are built and nothing is validated; the rows come straight
+    from the users table, so read-only endpoints can serialize them as is.
+    """
+    query = (
+        select(*RESPONSE_COLUMNS)
+        .where(*user_filters(role, organization_id, team_id, lead_id))
+        .order_by(UserModel.created_at, UserModel.id)
+        .offset(skip)
+        .limit(limit)
+    )
+    
+    if after is not None:
+        query = query.where(_after_created(after, (await db.connection()).dialect.name))
+    
+    with phase("query"):
+        result = await db.execute(query)
+        return result.all()
+
 async def get_all_users(
     db: AsyncSession, 
     skip: int = 0, 
     limit: int = 100,
-    role: Optional[UserRole] = None
+    role: Optional[UserRole] = None,
+    after: Optional[Tuple[datetime, str]] = None,
+    organization_id: Optional[str] = None,
+    team_id: Optional[str] = None,
+    lead_id: Optional[str] = None
 ) -> List[User]:
-    """Get all users with pagination and optional role filter"""
-    query = select(UserModel).offset(skip).limit(limit)
+    """Get users like get_user_rows, validated as User models in a single pass"""
+    rows = await get_user_rows(db, skip, limit, role, after, organization_id, team_id, lead_id)
+    with phase("validate"):
+        return user_list_adapter.validate_python(rows, from_attributes=True)
+
+
+async def stream_users(
+    role: Optional[UserRole] = None,
+    batch_size: int = settings.EXPORT_BATCH_SIZE
+) -> AsyncIterator[Sequence[Mapping[str, Any]]]:
+    """
+    Stream all users in batches of row mappings using a server-side cursor.
     
+    Opens its own session because the response body is produced after the
+    request's get_db dependency has already closed. Only the response
+    columns are selected and no ORM objects are built, so memory stays at
+    one batch regardless of table size.
+    """
+    query = (
+        select(*RESPONSE_COLUMNS)
+        .order_by(UserModel.created_at, UserModel.id)
+        .execution_options(yield_per=batch_size)
+    )
     if role:
         query = query.where(UserModel.role == role)
     
-    result = await db.execute(query)
-    users = result.scalars().all()
-    return [User.model_validate(user) for user in users]
+    async with async_session_maker() as session:
+        result = await session.stream(query)
+        async for rows in result.mappings().partitions():
+            yield rows
+
+# Columns matched by search_users, each with a lower() btree and a trigram index
+SEARCH_COLUMNS = [UserModel.username, UserModel.email, UserModel.first_name, UserModel.last_name]
+
+def _escape_like(value: str) -> str:
+    # "!" rather than backslash, whose quoting in ESCAPE '...' depends on standard_conforming_strings
+    return value.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+
+async def search_users(
+    db: AsyncSession,
+    q: str,
+    match: Literal["prefix", "fuzzy"] = "prefix",
+    ranked: bool = False,
+    skip: int = 0,
+    limit: int = 20,
+    after: Optional[Tuple[Any, str]] = None
+) -> List[UserSearchResult]:
+    """
+    Search users by username, email, first name and last name.
+    
+    "prefix" matches columns starting with `q` (case-insensitive) through the
+    lower() text_pattern_ops indexes. "fuzzy" also matches substrings and,
+    on PostgreSQL, pg_trgm similar strings (typos) through the trigram GIN
+    indexes.
+    
+    Results are ordered by (created_at, id), or in ranked mode by score
+    (best trigram similarity, plus 1 for a username/email prefix hit) then
+    id. `after` is the keyset position of the last row of the previous page
+    in the same order.
+    """
+    dialect_name = (await db.connection()).dialect.name
+    prefix = _escape_like(q.lower()) + "%"
+    prefix_hits = [func.lower(column).like(prefix, escape="!") for column in SEARCH_COLUMNS]
+    
+    if match == "prefix":
+        condition = or_(*prefix_hits)
+    else:
+        pattern = "%" + _escape_like(q) + "%"
+        fuzzy_hits = [column.ilike(pattern, escape="!") for column in SEARCH_COLUMNS]
+        if dialect_name == "postgresql":
+            fuzzy_hits += [column.op("%")(q) for column in SEARCH_COLUMNS]
+        condition = or_(*fuzzy_hits)
+    
+    query = select(*RESPONSE_COLUMNS).where(condition)
+    
+    if not ranked:
+        query = query.order_by(UserModel.created_at, UserModel.id)
+        if after is not None:
+            query = query.where(_after_created(after, dialect_name))
+    else:
+        if dialect_name == "postgresql":
+            similarity = func.greatest(*[func.similarity(func.coalesce(column, ""), q) for column in SEARCH_COLUMNS])
+        else:
+            similarity = literal(0.0)
+        score = (
+            cast(similarity, Float)
+            + case((or_(prefix_hits[0], prefix_hits[1]), 1.0), else_=0.0)
+        ).label("score")
+        query = query.add_columns(score).order_by(score.desc(), UserModel.id)
+        if after is not None:
+            after_score, after_id = after
+            query = query.where(or_(score < after_score, and_(score == after_score, UserModel.id > after_id)))
+    
+    query = query.offset(skip).limit(limit)
+    
+    with phase("query"):
+        rows = (await db.execute(query)).mappings().all()
+    with phase("validate"):
+        return [UserSearchResult.model_validate(row) for row in rows]
+
+def _conflicting_field(error: IntegrityError) -> Optional[str]:
+    """Work out which unique column (username or email) an IntegrityError violated"""
+    # asyncpg exposes the violated constraint; other drivers only have the message
+    constraint = getattr(getattr(error.orig, "__cause__", None), "constraint_name", None) or ""
+    message = str(error.orig)
+    for field in ("username", "email"):
+        if field in constraint or f"({field})" in message or f"users.{field}" in message:
+            return field
+    return None
+
+def _user_exists_error(error: IntegrityError) -> UserExistsError:
+    field = _conflicting_field(error)
+    if field is None:
+        return UserExistsError("Username or email already registered")
+    return UserExistsError(f"{field.capitalize()} already registered")
 
 async def create_new_user(
     db: AsyncSession, 
     user_data: UserCreate, 
     current_user: User
 ) -> User:
-    """Create a new user"""
+    """
+    Create a new user with a single INSERT ... RETURNING.
+    
+    Uniqueness is enforced by the username/email unique constraints rather
+    than by pre-checking, so concurrent creations cannot both succeed.
+    """
     # Check if current user can create a user with given role
     if not check_role_permissions(current_user.role, user_data.role):
         raise ValueError(f"User with role {current_user.role} cannot create user with role {user_data.role}")
     
-    # Check if username or email already exists
-    existing_user = await get_user_by_username(db, user_data.username)
-    if existing_user:
-        raise ValueError("Username already registered")
-    
-    existing_email = await get_user_by_email(db, user_data.email)
-    if existing_email:
-        raise ValueError("Email already registered")
-    
-    # Create user model
-    hashed_password = get_password_hash(user_data.password)
-    db_user = UserModel(
-        id=str(uuid.uuid4()),
-        username=user_data.username,
-        email=user_data.email,
-        password=hashed_password,
-        role=user_data.role,
-        first_name=user_data.first_name,
-        last_name=user_data.last_name,
-        phone=user_data.phone
+    hashed_password = await get_password_hash_async(user_data.password)
+    query = (
+        insert(UserModel.__table__)
+        .values(
+            id=str(uuid.uuid4()),
+            username=user_data.username,
+            email=user_data.email,
+            password=hashed_password,
+            role=user_data.role,
+            disabled=False,
+            first_name=user_data.first_name,
+            last_name=user_data.last_name,
+            phone=user_data.phone
+        )
+        .returning(*RESPONSE_COLUMNS)
     )
     
-    db.add(db_user)
-    await db.commit()
-    await db.refresh(db_user)
+    try:
+        result = await db.execute(query)
+        row = result.mappings().one()
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        raise _user_exists_error(e)
+    
+    return User.model_validate(row)
+
+# Columns written by bulk import, in COPY record order
+IMPORT_COLUMNS = [
+    "id", "username", "email", "password", "role", "disabled",
+    "first_name", "last_name", "phone"
+]
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors()
+    )
+
+def _in_values(column, values: set, dialect_name: str):
+    """`column IN values` as a single array parameter on PostgreSQL (no bind-parameter limit)"""
+    if dialect_name == "postgresql":
+        return column == any_(bindparam(f"{column.key}_values", list(values), type_=ARRAY(String)))
+    return column.in_(values)
+
+async def _bulk_insert_users(db: AsyncSession, records: List[tuple]) -> None:
+    """Load user records with COPY on asyncpg, or a multi-row INSERT on other drivers"""
+    connection = await db.connection()
+    if connection.dialect.driver == "asyncpg":
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            UserModel.__tablename__, records=records, columns=IMPORT_COLUMNS
+        )
+    else:
+        await db.execute(
+            insert(UserModel.__table__),
+            [dict(zip(IMPORT_COLUMNS, record)) for record in records]
+        )
+
+async def import_users(
+    db: AsyncSession, 
+    rows: List[Tuple[int, Any]], 
+    current_user: User
+) -> UserImportResult:
+    """
+    Create many users in one transaction.
+    
+    Every invalid row is reported with its row number and the valid rows are
+    still created. Role permissions are checked once per role, conflicts with
+    existing usernames/emails are found with one query, passwords are hashed
+    in parallel on the hashing pool and the rows are loaded in bulk.
+    """
+    errors: List[UserImportError] = []
+    candidates: List[Tuple[int, UserCreate]] = []
+    role_allowed = {}
+    usernames, emails = set(), set()
+    
+    for number, raw in rows:
+        if isinstance(raw, Exception):
+            errors.append(UserImportError(row=number, error=f"Invalid row: {raw}"))
+            continue
+        try:
+            user_data = UserCreate.model_validate(raw)
+        except ValidationError as e:
+            errors.append(UserImportError(
+                row=number, username=str(raw.get("username") or "") or None, error=_format_validation_error(e)
+            ))
+            continue
+        
+        if user_data.role not in role_allowed:
+            role_allowed[user_data.role] = check_role_permissions(current_user.role, user_data.role)
+        if not role_allowed[user_data.role]:
+            error = f"User with role {current_user.role.value} cannot create user with role {user_data.role.value}"
+        elif user_data.username in usernames:
+            error = "Duplicate username in upload"
+        elif user_data.email in emails:
+            error = "Duplicate email in upload"
+        else:
+            usernames.add(user_data.username)
+            emails.add(user_data.email)
+            candidates.append((number, user_data))
+            continue
+        errors.append(UserImportError(row=number, username=user_data.username, error=error))
+    
+    if candidates:
+        dialect_name = (await db.connection()).dialect.name
+        result = await db.execute(
+            select(UserModel.username, UserModel.email).where(or_(
+                _in_values(UserModel.username, usernames, dialect_name),
+                _in_values(UserModel.email, emails, dialect_name),
+            ))
+        )
+        taken_usernames, taken_emails = set(), set()
+        for username, email in result:
+            taken_usernames.add(username)
+            taken_emails.add(email)
+        
+        accepted = []
+        for number, user_data in candidates:
+            if user_data.username in taken_usernames:
+                errors.append(UserImportError(row=number, username=user_data.username, error="Username already registered"))
+            elif user_data.email in taken_emails:
+                errors.append(UserImportError(row=number, username=user_data.username, error="Email already registered"))
+            else:
+                accepted.append(user_data)
+        candidates = accepted
+        # End the read transaction so the connection goes back to the pool
+        # while passwords are hashed; users registered meanwhile are caught
+        # by the unique constraints on insert
+        await db.rollback()
     
-    return User.model_validate(db_user)
+    hashed_passwords = await get_password_hashes_async([user_data.password for user_data in candidates])
+    records = [
+        (
+            str(uuid.uuid4()), user_data.username, user_data.email, hashed_password,
+            user_data.role.value, False, user_data.first_name, user_data.last_name, user_data.phone
+        )
+        for user_data, hashed_password in zip(candidates, hashed_passwords)
+    ]
+    
+    if records:
+        try:
+            await _bulk_insert_users(db, records)
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            raise UserExistsError(
+                "A username or email in the upload was registered concurrently; no users were imported"
+            )
+    
+    errors.sort(key=lambda error: error.row)
+    return UserImportResult(created=len(records), errors=errors)
 
 async def update_existing_user(
     db: AsyncSession, 
     user_id: str, 
     user_data: UserUpdate
 ) -> Optional[User]:
-    """Update an existing user"""
-    db_user = await db.get(UserModel, user_id)
-    if not db_user:
-        return None
+    """
+    Update an existing user with a single UPDATE ... RETURNING.
     
-    # Update user fields if provided
+    Returns None if the user does not exist. Username/email clashes are
+    reported from the unique constraint violation.
+    """
     update_data = user_data.model_dump(exclude_unset=True)
+    if not update_data:
+        return await get_user_by_id(db, user_id)
     
-    # Check if username or email is being changed and if it already exists
-    if "username" in update_data and update_data["username"] != db_user.username:
-        existing_user = await get_user_by_username(db, update_data["username"])
-        if existing_user:
-            raise ValueError("Username already registered")
-    
-    if "email" in update_data and update_data["email"] != db_user.email:
-        existing_email = await get_user_by_email(db, update_data["email"])
-        if existing_email:
-            raise ValueError("Email already registered")
-    
-    # Update user
-    for key, value in update_data.items():
-        setattr(db_user, key, value)
+    query = (
+        update(UserModel.__table__)
+        .where(UserModel.id == user_id)
+        .values(**update_data)
+        .returning(*RESPONSE_COLUMNS)
+    )
     
-    await db.commit()
-    await db.refresh(db_user)
+    try:
+        result = await db.execute(query)
+        row = result.mappings().first()
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        raise _user_exists_error(e)
     
-    return User.model_validate(db_user)
+    user_cache.invalidate(user_id)
+    mark_recent_write(user_id)
+    if row is None:
+        return None
+    return User.model_validate(row)
 
 async def delete_user(db: AsyncSession, user_id: str) -> bool:
     """Delete a user"""
@@ -123,6 +469,8 @@ async def delete_user(db: AsyncSession, user_id: str) -> bool:
     
     await db.delete(db_user)
     await db.commit()
+    user_cache.invalidate(user_id)
+    mark_recent_write(user_id)
     
     return True
 
@@ -138,12 +486,14 @@ async def change_user_password(
         return False
     
     # Verify current password
-    if not verify_password(current_password, db_user.password):
+    if not await verify_password_async(current_password, db_user.password):
         raise ValueError("Current password is incorrect")
     
     # Update password
-    db_user.password = get_password_hash(new_password)
+    db_user.password = await get_password_hash_async(new_password)
     await db.commit()
+    user_cache.invalidate(user_id)
+    mark_recent_write(user_id)
     
     return True
 
@@ -159,5 +509,6 @@ async def update_user_last_login(
     
     db_user.last_login = login_time
     await db.commit()
+    user_cache.invalidate(user_id)
     
     return True
\ No newline at end of file
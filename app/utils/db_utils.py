@@ -3,33 +3,38 @@ from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 from app.models.user import User
 from app.core.roles import UserRole
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash_async
 import logging
 import uuid
-from app.db.session import async_session_maker
+from app.config import settings
+from app.db.migrate import get_current_revision, get_head_revision
+from app.db.session import async_session_maker, engine
 
 logger = logging.getLogger(__name__)
 
-async def verify_and_update_schema() -> None:
+async def check_schema_version() -> None:
     """
-    Verify and update database schema if needed.
-    This function is called on application startup.
+    Check that the database is migrated to the latest revision.
+    This function is called on application startup; migrations themselves
+    are applied out-of-band with `python -m app.db.migrate`.
     """
-    logger.info("Verifying database schema...")
+    if settings.SCHEMA_VERSION_CHECK == "off":
+        return
     
-    async with async_session_maker() as session:
-        try:
-            # You can add schema verification logic here if needed
-            # For example, checking if all required tables exist
-            
-            # Simple test query to verify database connection
-            result = await session.execute(text("SELECT 1"))
-            result.scalar()
-            
-            logger.info("Database schema verification completed")
-        except SQLAlchemyError as e:
-            logger.error(f"Database schema verification error: {str(e)}")
-            raise
+    async with engine.connect() as connection:
+        current = await connection.run_sync(get_current_revision)
+    head = get_head_revision()
+    
+    if current != head:
+        message = (
+            f"Database schema is at revision {current}, expected {head}. "
+            "Run `python -m app.db.migrate` to upgrade it."
+        )
+        if settings.SCHEMA_VERSION_CHECK == "strict":
+            raise RuntimeError(message)
+        logger.warning(message)
+    else:
+        logger.info(f"Database schema is at revision {head}")
 
 async def ensure_super_admin() -> None:
     """
@@ -52,7 +57,7 @@ async def ensure_super_admin() -> None:
                 
                 # Create default super admin
                 user_id = str(uuid.uuid4())
-                hashed_password = get_password_hash("adminpassword")  # Change this in production
+                hashed_password = await get_password_hash_async("adminpassword")  # Change this in production
                 
                 await session.execute(
                     text("""
@@ -0,0 +1,53 @@
+import csv
+import io
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Any, AsyncIterator, List, Mapping, Sequence
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+async def iter_ndjson(batches: AsyncIterator[Sequence[Mapping[str, Any]]]) -> AsyncIterator[str]:
+    """
+    Render batches of row mappings as newline-delimited JSON.
+
+    Yields one chunk per batch so memory use is bounded by the batch size.
+    """
+    async for rows in batches:
+        yield "".join(json.dumps(dict(row), default=_json_default) + "\n" for row in rows)
+
+
+async def iter_csv(
+    batches: AsyncIterator[Sequence[Mapping[str, Any]]],
+    columns: List[str]
+) -> AsyncIterator[str]:
+    """
+    Render batches of row mappings as CSV with a header row.
+
+    Yields one chunk per batch so memory use is bounded by the batch size.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+
+    async for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_value(row[column]) for column in columns] for row in rows)
+        yield buffer.getvalue()
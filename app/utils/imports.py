@@ -0,0 +1,72 @@
+import csv
+import io
+import json
+from typing import Any, BinaryIO, Dict, List, TextIO, Tuple
+
+from app.core.exceptions import ImportTooLargeError
+
+
+def parse_user_rows(stream: BinaryIO, fmt: str, max_rows: int) -> List[Tuple[int, Any]]:
+    """
+    Parse an uploaded CSV or NDJSON file into numbered raw rows.
+
+    Rows are numbered from 1 in data order (the CSV header is not counted).
+    A row that cannot be parsed is returned as an Exception so the caller can
+    report it alongside validation errors. The file is decoded and parsed
+    line by line, so an oversized upload is rejected after `max_rows` rows
+    instead of being read into memory first.
+
+    Args:
+        stream: Binary file object of the upload (UTF-8, optional BOM)
+        fmt: "csv" or "ndjson"
+        max_rows: Most data rows accepted
+
+    Returns:
+        List of (row number, dict or Exception)
+
+    Raises:
+        ImportTooLargeError: If the upload has more than max_rows rows
+        UnicodeDecodeError: If the upload is not UTF-8
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="" if fmt == "csv" else None)
+    try:
+        return _parse_csv(text, max_rows) if fmt == "csv" else _parse_ndjson(text, max_rows)
+    finally:
+        # Leave the upload open for its owner instead of closing it with the wrapper
+        text.detach()
+
+
+def _parse_csv(text: TextIO, max_rows: int) -> List[Tuple[int, Any]]:
+    rows: List[Tuple[int, Any]] = []
+    for number, row in enumerate(csv.DictReader(text), start=1):
+        if number > max_rows:
+            raise ImportTooLargeError(f"Upload exceeds the limit of {max_rows} rows")
+        # Empty CSV cells mean "not provided", not empty strings
+        rows.append((number, {key: value for key, value in row.items() if value not in ("", None)}))
+    return rows
+
+
+def _parse_ndjson(text: TextIO, max_rows: int) -> List[Tuple[int, Any]]:
+    rows: List[Tuple[int, Any]] = []
+    number = 0
+    for line in text:
+        if not line.strip():
+            continue
+        number += 1
+        if number > max_rows:
+            raise ImportTooLargeError(f"Upload exceeds the limit of {max_rows} rows")
+        try:
+            row: Dict[str, Any] = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError("Expected a JSON object")
+            rows.append((number, row))
+        except ValueError as e:
+            rows.append((number, e))
+    return rows
+
+
+def detect_format(filename: str, content_type: str) -> str:
+    """Guess "csv" or "ndjson" from the upload's filename and content type."""
+    if filename.lower().endswith(".csv") or content_type in ("text/csv", "application/csv"):
+        return "csv"
+    return "ndjson"
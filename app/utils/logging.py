@@ -1,52 +1,164 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
 import sys
-from datetime import datetime
+from datetime import datetime, timezone
 import os
+from typing import Dict, List
+
+from app.config import settings
 
 # Create logs directory if it doesn't exist
-os.makedirs("logs", exist_ok=True)
+os.makedirs(settings.LOG_DIR, exist_ok=True)
 
 # Configure logging format
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
 
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "logger": record.name,
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never blocks the caller.
+
+    Records are put on a bounded queue with put_nowait; when the listener
+    falls behind (slow disk, blocked stdout) new records are dropped and
+    counted instead of stalling the request that logged them.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
 class LoggerFactory:
     """Factory class to create and configure loggers."""
-    
+
+    _queue_handlers: Dict[str, DroppingQueueHandler] = {}
+    _listeners: List[logging.handlers.QueueListener] = []
+
+    @staticmethod
+    def get_formatter() -> logging.Formatter:
+        """Return the JSON or plain text formatter, depending on LOG_JSON."""
+        if settings.LOG_JSON:
+            return JsonFormatter()
+        return logging.Formatter(LOG_FORMAT, DATE_FORMAT)
+
+    @staticmethod
+    def _attach_queue(logger: logging.Logger, name: str, *handlers: logging.Handler) -> None:
+        """Give `logger` a DroppingQueueHandler drained into `handlers` by a listener thread."""
+        queue_handler = DroppingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+        listener = logging.handlers.QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+        listener.start()
+
+        logger.addHandler(queue_handler)
+        LoggerFactory._queue_handlers[name] = queue_handler
+        LoggerFactory._listeners.append(listener)
+
     @staticmethod
     def get_logger(name: str, level: int = logging.INFO) -> logging.Logger:
         """
         Create and configure a logger instance.
-        
+
+        The logger only gets a non-blocking queue handler. A background
+        QueueListener thread writes the records to stdout and to
+        logs/<name>.log, which rotates at midnight. Records do not propagate
+        to the root logger, so each one is written once and never through a
+        synchronous handler.
+
         Args:
             name: Name of the logger
             level: Logging level (default: INFO)
-            
+
         Returns:
             Configured logger instance
         """
         logger = logging.getLogger(name)
         logger.setLevel(level)
-        
+        logger.propagate = False
+
         # Avoid adding handlers if they already exist
         if not logger.handlers:
+            formatter = LoggerFactory.get_formatter()
+
             # Console handler
             console_handler = logging.StreamHandler(sys.stdout)
-            console_handler.setFormatter(logging.Formatter(LOG_FORMAT, DATE_FORMAT))
-            logger.addHandler(console_handler)
-            
+            console_handler.setFormatter(formatter)
+
             # File handler with daily rotation
-            today = datetime.now().strftime("%Y-%m-%d")
-            file_handler = logging.FileHandler(f"logs/{name}_{today}.log")
-            file_handler.setFormatter(logging.Formatter(LOG_FORMAT, DATE_FORMAT))
-            logger.addHandler(file_handler)
-        
+            file_handler = logging.handlers.TimedRotatingFileHandler(
+                os.path.join(settings.LOG_DIR, f"{name}.log"),
+                when="midnight",
+                backupCount=settings.LOG_BACKUP_COUNT,
+                encoding="utf-8",
+                delay=True,
+            )
+            file_handler.setFormatter(formatter)
+
+            LoggerFactory._attach_queue(logger, name, console_handler, file_handler)
+
         return logger
 
+    @staticmethod
+    def configure_root(level: int = logging.INFO) -> None:
+        """
+        Route the root logger through a queue as well.
+
+        Replaces the synchronous handlers (e.g. from logging.basicConfig) of
+        the root logger, which receives the records of every logger outside
+        the factory ones, with a queue handler drained to stdout.
+        """
+        root = logging.getLogger()
+        root.setLevel(level)
+        if "root" in LoggerFactory._queue_handlers:
+            return
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(LoggerFactory.get_formatter())
+        LoggerFactory._attach_queue(root, "root", console_handler)
+
+    @staticmethod
+    def dropped_records() -> Dict[str, int]:
+        """Return the number of records dropped per logger because its queue was full."""
+        return {name: handler.dropped for name, handler in LoggerFactory._queue_handlers.items()}
+
+    @staticmethod
+    def shutdown() -> None:
+        """Flush queued records and stop the listener threads."""
+        for listener in LoggerFactory._listeners:
+            listener.stop()
+        LoggerFactory._listeners.clear()
+
+
+atexit.register(LoggerFactory.shutdown)
+
 
 # Application loggers
 app_logger = LoggerFactory.get_logger("app")
 api_logger = LoggerFactory.get_logger("api")
 db_logger = LoggerFactory.get_logger("db")
-auth_logger = LoggerFactory.get_logger("auth")
\ No newline at end of file
+auth_logger = LoggerFactory.get_logger("auth")
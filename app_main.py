@@ -8,6 +8,8 @@ from datetime import datetime, timedelta
 from passlib.context import CryptContext
 import uuid
 import os
+import json
+import hashlib
 from dotenv import load_dotenv
 from urllib.parse import urlparse
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
@@ -239,37 +241,124 @@ async def read_users(
         for user in users
     ]
 
+# Expected shape of the users table, used both for the diff and the fingerprint
+EXPECTED_COLUMNS = {
+    'id': {'type': 'character varying', 'nullable': False},
+    'username': {'type': 'character varying', 'nullable': True},
+    'email': {'type': 'character varying', 'nullable': True},
+    'password': {'type': 'character varying', 'nullable': True},
+    'role': {'type': 'userrole', 'nullable': True},
+    'disabled': {'type': 'boolean', 'nullable': True}
+}
+UNIQUE_INDEXED_COLUMNS = ['username', 'email']
+EXPECTED_SCHEMA_FINGERPRINT = hashlib.sha256(json.dumps({
+    'columns': EXPECTED_COLUMNS,
+    'enum': [role.value for role in UserRole],
+    'unique_indexed': UNIQUE_INDEXED_COLUMNS,
+}, sort_keys=True).encode()).hexdigest()[:16]
+SCHEMA_COMMENT_PREFIX = "schema:"
+
+# "fingerprint" skips verification when the fingerprint stored on the users
+# table matches EXPECTED_SCHEMA_FINGERPRINT; "full" always verifies
+SCHEMA_VERIFY_MODE = os.getenv("SCHEMA_VERIFY_MODE", "fingerprint")
+
+# Everything verify_and_update_schema needs, in a single catalog round trip
+SCHEMA_STATE_SQL = text("""
+    SELECT
+        to_regclass('users') IS NOT NULL AS table_exists,
+        to_regclass('alembic_version') IS NOT NULL AS migrations_managed,
+        obj_description(to_regclass('users'), 'pg_class') AS table_comment,
+        EXISTS (SELECT 1 FROM pg_type WHERE typname = 'userrole') AS enum_exists,
+        (
+            SELECT coalesce(json_agg(e.enumlabel ORDER BY e.enumsortorder), '[]'::json)
+            FROM pg_enum e JOIN pg_type t ON t.oid = e.enumtypid
+            WHERE t.typname = 'userrole'
+        ) AS enum_values,
+        (
+            SELECT coalesce(json_object_agg(column_name, json_build_object(
+                'data_type', data_type, 'is_nullable', is_nullable, 'udt_name', udt_name
+            )), '{}'::json)
+            FROM information_schema.columns
+            WHERE table_name = 'users'
+        ) AS columns,
+        (
+            SELECT coalesce(json_agg(indexname), '[]'::json)
+            FROM pg_indexes
+            WHERE tablename = 'users'
+        ) AS indexes,
+        (
+            SELECT coalesce(json_agg(json_build_object(
+                'name', tc.constraint_name, 'type', tc.constraint_type, 'column', ccu.column_name
+            )), '[]'::json)
+            FROM information_schema.table_constraints tc
+            JOIN information_schema.constraint_column_usage ccu
+                ON ccu.constraint_name = tc.constraint_name AND ccu.table_name = tc.table_name
+            WHERE tc.table_name = 'users'
+        ) AS constraints;
+""")
+
+
+def _json_value(value):
+    # asyncpg returns json columns as text
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def _stored_fingerprint(table_comment):
+    if table_comment and table_comment.startswith(SCHEMA_COMMENT_PREFIX):
+        return table_comment[len(SCHEMA_COMMENT_PREFIX):]
+    return None
+
+
+async def _store_fingerprint(conn):
+    await conn.execute(text(
+        f"COMMENT ON TABLE users IS '{SCHEMA_COMMENT_PREFIX}{EXPECTED_SCHEMA_FINGERPRINT}'"
+    ))
+
+
 # Define the schema verification and migration function
 async def verify_and_update_schema():
-    """Verify database schema and make necessary updates"""
+    """
+    Verify database schema and make necessary updates.
+
+    The table, column, enum, index and constraint state is fetched with one
+    catalog query and diffed in memory. After a successful verification the
+    expected-schema fingerprint is stored as the users table comment; with
+    SCHEMA_VERIFY_MODE=fingerprint (the default) a matching fingerprint ends
+    verification right after that first query. Issues that need a manual
+    migration leave the fingerprint unset, so they are reported again on
+    every start until fixed.
+    """
     print("Starting database schema verification...")
     
     async with engine.begin() as conn:
-        # 1. Check if the table exists at all
-        check_table_sql = text("""
-            SELECT EXISTS (
-                SELECT 1 FROM information_schema.tables 
-                WHERE table_name = 'users'
-            );
-        """)
-        result = await conn.execute(check_table_sql)
-        table_exists = result.scalar()
+        state = (await conn.execute(SCHEMA_STATE_SQL)).mappings().one()
+        
+        # Databases migrated with `python -m app.db.migrate` are left alone
+        if state['migrations_managed']:
+            print("Schema is managed by migrations, skipping verification")
+            return
         
-        if not table_exists:
+        # 1. Check if the table exists at all
+        if not state['table_exists']:
             print("Users table doesn't exist. Creating from scratch.")
             await conn.run_sync(Base.metadata.create_all)
+            await _store_fingerprint(conn)
             return  # Exit early since we created everything from scratch
         
-        # 2. Check and create userrole enum if it doesn't exist
-        check_enum_sql = text("""
-            SELECT EXISTS (
-                SELECT 1 FROM pg_type WHERE typname = 'userrole'
-            );
-        """)
-        result = await conn.execute(check_enum_sql)
-        enum_exists = result.scalar()
+        if (
+            SCHEMA_VERIFY_MODE == "fingerprint"
+            and _stored_fingerprint(state['table_comment']) == EXPECTED_SCHEMA_FINGERPRINT
+        ):
+            print("Schema fingerprint matches, skipping verification")
+            return
+        
+        columns = _json_value(state['columns'])
+        indexes = set(_json_value(state['indexes']))
+        constraints = _json_value(state['constraints'])
+        unresolved = []
         
-        if not enum_exists:
+        # 2. Check and create userrole enum if it doesn't exist
+        if not state['enum_exists']:
             print("Creating userrole enum type")
             create_enum_sql = text("""
                 CREATE TYPE userrole AS ENUM ('super_admin', 'manager', 'team_head', 'member');
@@ -277,39 +366,18 @@ async def verify_and_update_schema():
             await conn.execute(create_enum_sql)
         else:
             # Verify enum values match our expectations
-            check_enum_values_sql = text("""
-                SELECT enumlabel FROM pg_enum 
-                WHERE enumtypid = (SELECT oid FROM pg_type WHERE typname = 'userrole')
-                ORDER BY enumsortorder;
-            """)
-            result = await conn.execute(check_enum_values_sql)
-            db_enum_values = [row[0] for row in result.fetchall()]
+            db_enum_values = _json_value(state['enum_values'])
             expected_values = [role.value for role in UserRole]
             
             if set(db_enum_values) != set(expected_values):
                 print(f"Enum values mismatch. DB values: {db_enum_values}, Expected: {expected_values}")
                 print("WARNING: Enum values differ but won't be automatically updated as it could break existing data")
                 print("Consider manual migration if this is intentional")
+                unresolved.append("userrole enum values")
         
         # 3. Check each required column in the users table
-        expected_columns = {
-            'id': {'type': 'character varying', 'nullable': False},
-            'username': {'type': 'character varying', 'nullable': True},
-            'email': {'type': 'character varying', 'nullable': True},
-            'password': {'type': 'character varying', 'nullable': True},
-            'role': {'type': 'userrole', 'nullable': True},
-            'disabled': {'type': 'boolean', 'nullable': True}
-        }
-        
-        for column_name, specs in expected_columns.items():
-            # Check if column exists
-            check_column_sql = text(f"""
-                SELECT data_type, is_nullable 
-                FROM information_schema.columns 
-                WHERE table_name = 'users' AND column_name = '{column_name}';
-            """)
-            result = await conn.execute(check_column_sql)
-            column_info = result.fetchone()
+        for column_name, specs in EXPECTED_COLUMNS.items():
+            column_info = columns.get(column_name)
             
             if not column_info:
                 print(f"Column '{column_name}' missing. Adding it now.")
@@ -328,90 +396,76 @@ async def verify_and_update_schema():
                 print(f"Added column '{column_name}' to users table")
                 
                 # Add indexes for certain columns
-                if column_name in ['username', 'email']:
+                if column_name in UNIQUE_INDEXED_COLUMNS:
                     index_name = f"ix_users_{column_name}"
                     create_index_sql = text(f"CREATE INDEX IF NOT EXISTS {index_name} ON users ({column_name});")
                     await conn.execute(create_index_sql)
+                    indexes.add(index_name)
                     print(f"Created index for '{column_name}'")
                     
                     # Add unique constraint
                     constraint_name = f"uq_users_{column_name}"
                     create_constraint_sql = text(f"ALTER TABLE users ADD CONSTRAINT {constraint_name} UNIQUE ({column_name});")
                     await conn.execute(create_constraint_sql)
+                    constraints.append({'name': constraint_name, 'type': 'UNIQUE', 'column': column_name})
                     print(f"Added unique constraint for '{column_name}'")
             else:
-                data_type, is_nullable = column_info
-                is_nullable = is_nullable == 'YES'
+                data_type = column_info['data_type']
+                is_nullable = column_info['is_nullable'] == 'YES'
                 
                 # Check if actual column type matches expected type
                 if data_type == 'USER-DEFINED' and column_name == 'role':
                     # For enum types, PostgreSQL reports them as USER-DEFINED
                     # Check if the column uses the right enum type
-                    check_enum_column_sql = text(f"""
-                        SELECT udt_name FROM information_schema.columns 
-                        WHERE table_name = 'users' AND column_name = 'role';
-                    """)
-                    result = await conn.execute(check_enum_column_sql)
-                    udt_name = result.scalar()
+                    udt_name = column_info['udt_name']
                     
                     if udt_name != 'userrole':
                         print(f"Column 'role' has wrong enum type: {udt_name}")
                         print("This requires manual migration due to potential data loss")
+                        unresolved.append("column 'role' type")
                 elif data_type != specs['type'] or is_nullable != specs['nullable']:
                     print(f"Column '{column_name}' has different type/nullability than expected")
                     print(f"Expected: {specs['type']}, {specs['nullable']}, Actual: {data_type}, {is_nullable}")
                     print("This requires manual migration due to potential data loss")
+                    unresolved.append(f"column '{column_name}' type/nullability")
         
         # 4. Check for indexes and constraints
-        for column_name in ['username', 'email']:
+        for column_name in UNIQUE_INDEXED_COLUMNS:
             # Check for index
-            check_index_sql = text(f"""
-                SELECT EXISTS (
-                    SELECT 1 FROM pg_indexes 
-                    WHERE tablename = 'users' AND indexname = 'ix_users_{column_name}'
-                );
-            """)
-            result = await conn.execute(check_index_sql)
-            index_exists = result.scalar()
-            
-            if not index_exists:
-                index_name = f"ix_users_{column_name}"
+            index_name = f"ix_users_{column_name}"
+            if index_name not in indexes:
                 create_index_sql = text(f"CREATE INDEX IF NOT EXISTS {index_name} ON users ({column_name});")
                 await conn.execute(create_index_sql)
                 print(f"Created missing index for '{column_name}'")
             
             # Check for unique constraint
-            check_constraint_sql = text(f"""
-                SELECT EXISTS (
-                    SELECT 1 FROM information_schema.table_constraints
-                    WHERE table_name = 'users' AND constraint_name = 'uq_users_{column_name}'
-                    AND constraint_type = 'UNIQUE'
-                );
-            """)
-            result = await conn.execute(check_constraint_sql)
-            constraint_exists = result.scalar()
+            constraint_name = f"uq_users_{column_name}"
+            constraint_exists = any(
+                c['name'] == constraint_name and c['type'] == 'UNIQUE' for c in constraints
+            )
             
             if not constraint_exists:
                 # Check if there's already a unique constraint with a different name
-                check_existing_constraint_sql = text(f"""
-                    SELECT EXISTS (
-                        SELECT 1 FROM information_schema.constraint_column_usage
-                        WHERE table_name = 'users' AND column_name = '{column_name}'
-                        AND constraint_name LIKE '%\_users\_%' ESCAPE '\\'
-                    );
-                """)
-                result = await conn.execute(check_existing_constraint_sql)
-                has_existing_constraint = result.scalar()
+                has_existing_constraint = any(
+                    c['column'] == column_name and '_users_' in c['name'] for c in constraints
+                )
                 
                 if not has_existing_constraint:
-                    constraint_name = f"uq_users_{column_name}"
                     create_constraint_sql = text(f"ALTER TABLE users ADD CONSTRAINT {constraint_name} UNIQUE ({column_name});")
                     try:
-                        await conn.execute(create_constraint_sql)
+                        # Savepoint so a failure (duplicate values) keeps the transaction usable
+                        async with conn.begin_nested():
+                            await conn.execute(create_constraint_sql)
                         print(f"Added unique constraint for '{column_name}'")
                     except Exception as e:
                         print(f"Could not add unique constraint for '{column_name}': {e}")
                         print("This might be due to duplicate values in the column")
+                        unresolved.append(f"unique constraint on '{column_name}'")
+        
+        if unresolved:
+            print(f"Schema fingerprint not stored, unresolved: {', '.join(unresolved)}")
+        else:
+            await _store_fingerprint(conn)
     
     print("Database schema verification completed")
 
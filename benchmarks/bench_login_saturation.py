@@ -0,0 +1,101 @@
+"""
+Measure /users/me latency while /login is saturated.
+
+Run the API first with rate limiting off, since the login flood would
+be answered with 429s instead of exercising bcrypt:
+
+    RATE_LIMIT_ENABLED=false uvicorn app.main:app --workers 1
+
+then:
+
+    python -m benchmarks.bench_login_saturation --base-url http://localhost:8000 \\
+        --username admin --password adminpassword
+
+The script records a baseline p50/p95/p99 for ``GET /api/v1/users/me``, then
+repeats the measurement while ``--login-concurrency`` clients hammer
+``POST /api/v1/login``. With bcrypt on the hashing pool the two sets of
+percentiles should stay close; with inline bcrypt the loaded p99 grows by
+roughly the bcrypt cost times the login concurrency.
+
+Requires ``httpx`` (not part of the application requirements).
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import List
+
+import httpx
+
+from benchmarks.common import percentiles
+
+API_PREFIX = "/api/v1"
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> httpx.Response:
+    return await client.post(
+        f"{API_PREFIX}/login",
+        data={"username": username, "password": password},
+    )
+
+
+async def probe_me(client: httpx.AsyncClient, token: str, duration: float) -> List[float]:
+    """Poll /users/me sequentially for the given duration and record latencies."""
+    headers = {"Authorization": f"Bearer {token}"}
+    samples = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await client.get(f"{API_PREFIX}/users/me", headers=headers)
+        response.raise_for_status()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def flood_login(
+    client: httpx.AsyncClient, username: str, password: str, stop: asyncio.Event, statuses: dict
+) -> None:
+    """Send login requests back to back until stopped."""
+    while not stop.is_set():
+        response = await login(client, username, password)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+
+async def main(args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=args.login_concurrency + 4)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        response = await login(client, args.username, args.password)
+        response.raise_for_status()
+        token = response.json()["access_token"]
+
+        baseline = await probe_me(client, token, args.duration)
+
+        stop = asyncio.Event()
+        statuses: dict = {}
+        flooders = [
+            asyncio.create_task(flood_login(client, args.username, args.password, stop, statuses))
+            for _ in range(args.login_concurrency)
+        ]
+        await asyncio.sleep(1)  # let the login queue fill up
+        loaded = await probe_me(client, token, args.duration)
+        stop.set()
+        await asyncio.gather(*flooders)
+
+    print(json.dumps(
+        {
+            "users_me_baseline": percentiles(baseline),
+            "users_me_under_login_load": percentiles(loaded),
+            "login_status_counts": {str(code): count for code, count in sorted(statuses.items())},
+        },
+        indent=2,
+    ))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="adminpassword")
+    parser.add_argument("--login-concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per measurement phase")
+    asyncio.run(main(parser.parse_args()))
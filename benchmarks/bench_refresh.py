@@ -0,0 +1,74 @@
+"""
+Compare the cost of renewing an access token by login and by refresh token.
+
+Run the API first with rate limiting off, since repeated logins of one
+username would exceed RATE_LIMIT_LOGIN_USERNAME_BURST within seconds:
+
+    RATE_LIMIT_ENABLED=false uvicorn app.main:app --workers 1
+
+then:
+
+    python -m benchmarks.bench_refresh --base-url http://localhost:8000 \\
+        --username admin --password adminpassword --requests 50
+
+Sends ``--requests`` sequential ``POST /api/v1/login`` requests, then as many
+``POST /api/v1/refresh`` requests, each with the refresh token returned by the
+previous one (the rotation a long-lived client goes through), and reports
+p50/p95/p99 latency for both. Login pays a bcrypt verification every time;
+refresh is a hashed-token lookup and two small writes.
+
+Requires ``httpx`` (not part of the application requirements).
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from benchmarks.common import git_revision, percentiles
+
+API_PREFIX = "/api/v1"
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=30.0) as client:
+        login_samples = []
+        for _ in range(args.requests):
+            started = time.perf_counter()
+            response = await client.post(
+                f"{API_PREFIX}/login",
+                data={"username": args.username, "password": args.password},
+            )
+            response.raise_for_status()
+            login_samples.append(time.perf_counter() - started)
+
+        refresh_token = response.json()["refresh_token"]
+        refresh_samples = []
+        for _ in range(args.requests):
+            started = time.perf_counter()
+            response = await client.post(f"{API_PREFIX}/refresh", json={"refresh_token": refresh_token})
+            response.raise_for_status()
+            refresh_samples.append(time.perf_counter() - started)
+            refresh_token = response.json()["refresh_token"]
+
+    login_stats, refresh_stats = percentiles(login_samples), percentiles(refresh_samples)
+    print(json.dumps(
+        {
+            "revision": git_revision(),
+            "parameters": {"requests": args.requests},
+            "login": login_stats,
+            "refresh": refresh_stats,
+            "p50_speedup": round(login_stats["p50_ms"] / refresh_stats["p50_ms"], 1),
+        },
+        indent=2,
+    ))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--requests", type=int, default=50, help="Requests per grant type")
+    asyncio.run(main(parser.parse_args()))
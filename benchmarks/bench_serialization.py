@@ -0,0 +1,119 @@
+"""
+Measure the per-row CPU cost of rendering a user list page.
+
+    python -m benchmarks.bench_serialization --users 2000 --page-size 100 --repeat 200
+
+Seeds the database like ``load_test`` and renders the same page of users
+``--repeat`` times through each pipeline, reporting CPU microseconds per
+row (process time, so SQLite's worker thread is included):
+
+- ``query_only``: the column select of get_user_rows, no rendering (floor)
+- ``orm_response_model``: the previous list path; ORM entities, one
+  User.model_validate per row, then FastAPI's response_model validation
+  and serialization of Page[User] and a stdlib JSONResponse
+- ``type_adapter_response_model``: get_all_users (column select validated by
+  one TypeAdapter(List[User]) pass) through the same response_model step
+- ``rows_orjson``: the current list path; get_user_rows rows rendered as
+  dicts by ORJSONResponse without any pydantic pass
+
+Run from the repository root so the ``app`` package is importable.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict
+
+from benchmarks.common import git_revision
+from benchmarks.load_test import seed_database
+
+
+async def run(args: argparse.Namespace, database_url: str) -> Dict[str, float]:
+    await seed_database(database_url, args.users)
+
+    # Imported after seeding so DATABASE_URL is already set when app.config loads
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_model_field
+    from sqlalchemy import select
+
+    from app.api.dependencies.pagination import Pagination
+    from app.core.responses import ORJSONResponse
+    from app.db.session import async_session_maker, engine
+    from app.models.user import UserModel
+    from app.schemas.base import Page
+    from app.schemas.user import User
+    from app.services.user_service import get_all_users, get_user_rows
+
+    response_field = create_model_field("Response", Page[User], mode="serialization")
+    pagination = Pagination(page=1, page_size=args.page_size, cursor=None)
+    limit = pagination.fetch_limit
+
+    async with async_session_maker() as db:
+        async def query_only() -> None:
+            await get_user_rows(db, limit=limit)
+
+        async def orm_response_model() -> None:
+            result = await db.execute(
+                select(UserModel).order_by(UserModel.created_at, UserModel.id).limit(limit)
+            )
+            users = [User.model_validate(user) for user in result.scalars().all()]
+            content = await serialize_response(field=response_field, response_content=pagination.paginate_response(users))
+            JSONResponse(content)
+            db.expunge_all()
+
+        async def type_adapter_response_model() -> None:
+            users = await get_all_users(db, limit=limit)
+            content = await serialize_response(field=response_field, response_content=pagination.paginate_response(users))
+            JSONResponse(content)
+
+        async def rows_orjson() -> None:
+            page = pagination.paginate_response(await get_user_rows(db, limit=limit))
+            page["items"] = [row._asdict() for row in page["items"]]
+            ORJSONResponse(page)
+
+        pipelines: Dict[str, Callable[[], Awaitable[None]]] = {
+            "query_only": query_only,
+            "orm_response_model": orm_response_model,
+            "type_adapter_response_model": type_adapter_response_model,
+            "rows_orjson": rows_orjson,
+        }
+        results: Dict[str, float] = {}
+        for name, pipeline in pipelines.items():
+            await pipeline()  # warm up statement caches
+            started = time.process_time()
+            for _ in range(args.repeat):
+                await pipeline()
+            elapsed = time.process_time() - started
+            results[f"{name}_us_per_row"] = round(elapsed / (args.repeat * limit) * 1e6, 2)
+
+    await engine.dispose()
+    return results
+
+
+def main(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        database_url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(tmpdir, 'bench.db')}"
+        os.environ["DATABASE_URL"] = database_url
+        results = asyncio.run(run(args, database_url))
+
+    print(json.dumps(
+        {
+            "revision": git_revision(),
+            "database": database_url.split(":", 1)[0],
+            "parameters": {"users": args.users, "page_size": args.page_size, "repeat": args.repeat},
+            "results": results,
+        },
+        indent=2,
+    ))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", help="Database to benchmark (default: temporary SQLite file)")
+    parser.add_argument("--users", type=int, default=2000, help="Number of users to seed")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200, help="Times each pipeline renders the page")
+    main(parser.parse_args())
@@ -0,0 +1,49 @@
+"""
+Compare decode_access_token throughput with the token cache on and off.
+
+    python -m benchmarks.bench_token_cache --iterations 100000
+
+Run from the repository root so the ``app`` package is importable.
+"""
+import argparse
+import json
+import time
+
+from app.core.security import create_access_token, decode_access_token, token_cache
+
+
+def run(token: str, iterations: int) -> float:
+    """Decode the same token repeatedly and return decodes per second."""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        decode_access_token(token)
+    return iterations / (time.perf_counter() - started)
+
+
+def main(args: argparse.Namespace) -> None:
+    token = create_access_token({"sub": "benchmark-user"})
+    max_size = token_cache.max_size
+
+    token_cache.max_size = 0
+    token_cache.clear()
+    uncached = run(token, args.iterations)
+
+    token_cache.max_size = max_size or 1
+    token_cache.clear()
+    cached = run(token, args.iterations)
+
+    print(json.dumps(
+        {
+            "iterations": args.iterations,
+            "cache_off_per_sec": round(uncached),
+            "cache_on_per_sec": round(cached),
+            "speedup": round(cached / uncached, 2),
+        },
+        indent=2,
+    ))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=100000)
+    main(parser.parse_args())